@@ -0,0 +1,304 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module benchmarks the search algorithms of `path.py` on
+synthetic graphs (see `generators.py`) of increasing size.
+
+For every kind and size of graph, the graph file is generated and parsed,
+and the same random queries are answered by every algorithm. Each
+algorithm runs the queries twice: an instrumented pass which counts the
+expansions (`tracing.SearchStats`) and the peak memory (`tracemalloc`),
+and a timed pass without any instrumentation. The results are written
+as JSON, and can be compared against the results of an earlier run to
+spot regressions.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import contraction
+import generators
+import landmarks
+import path
+import tracing
+
+# Ratio of the time per query to a baseline above which a case is
+# reported as a regression
+REGRESSION_RATIO = 1.2
+
+def random_queries(graph, count, seed=0):
+  """Pick random (start, goal) pairs of nodes which are connected.
+
+  Args:
+    graph: An instance of `common.Graph`
+    count: The number of queries
+    seed: Seed of the random number generator
+
+  Returns:
+    A list of (start, goal) tuples of node names.
+  """
+  rng = np.random.default_rng(seed)
+  queries = []
+  # Nodes of the largest component, so every query has a path
+  largest = np.flatnonzero(graph.components == np.bincount(graph.components).argmax())
+  if len(largest) < 2:
+    return queries
+  for start, goal in rng.choice(largest, size=(count, 2)).tolist():
+    queries.append((graph.names[start], graph.names[goal]))
+  return queries
+
+def load_graph(graph_file):
+  """Parse a graph file, timing the parse and the build of the graph.
+
+  The file is parsed a second time with `tracemalloc` to measure the
+  peak memory, so the timings are not slowed down by it.
+
+  Returns:
+    The tuple (graph, phases, peak_bytes), where phases maps `parse` and
+    `build` to their wall time in seconds.
+  """
+  with tracing.time_phases() as timer:
+    graph = path.read_graph(graph_file=graph_file)
+  tracemalloc.start()
+  try:
+    path.read_graph(graph_file=graph_file)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+  finally:
+    tracemalloc.stop()
+  return graph, timer.phases, peak_bytes
+
+def build_index(graph, alg, num_landmarks):
+  """Build the preprocessed index of an algorithm, if it needs one.
+
+  Returns:
+    The tuple (index, seconds).
+  """
+  begin = time.perf_counter()
+  index = None
+  if alg == path.Algorithms.ALT.name:
+    index = landmarks.select_landmarks(graph, num_landmarks)
+  elif alg == path.Algorithms.CH.name:
+    index = contraction.build_hierarchy(graph)
+  return index, time.perf_counter() - begin
+
+def _run_queries(graph, alg, queries, index, budget, growth):
+  """Answer the queries in order until the time budget is used up.
+
+  Returns:
+    The tuple (number of queries answered, seconds).
+  """
+  answered = 0
+  begin = time.perf_counter()
+  for start, goal in queries:
+    path.find_path(graph=graph, alg=alg, start=start, goal=goal,
+                   depth=0 if alg == path.Algorithms.ID.name else None, index=index,
+                   growth=growth)
+    answered += 1
+    if time.perf_counter() - begin > budget:
+      break
+  return answered, time.perf_counter() - begin
+
+def benchmark_algorithm(graph, alg, queries, index, budget, growth):
+  """Benchmark one algorithm on a graph.
+
+  Args:
+    graph: An instance of `common.Graph`
+    alg: One of the `path.Algorithms`
+    queries: A list of (start, goal) tuples
+    index: The preprocessed index of the algorithm (see `path.find_path`)
+    budget: The time budget in seconds after which no more queries
+      are started
+    growth: The minimum relative growth of the bound for IDASTAR
+
+  Returns:
+    A dict with the results of the algorithm.
+  """
+  tracemalloc.start()
+  try:
+    with tracing.collect_stats() as stats:
+      answered, _ = _run_queries(graph, alg, queries, index, budget, growth)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+  finally:
+    tracemalloc.stop()
+  # The timed pass answers the same queries without any instrumentation
+  _, seconds = _run_queries(graph, alg, queries[:answered], index, budget=float("inf"),
+                            growth=growth)
+  result = dict(algorithm=alg, queries=answered, seconds=round(seconds, 6),
+                seconds_per_query=round(seconds / max(answered, 1), 6),
+                expansions_per_second=round(stats.expanded / seconds) if seconds else 0,
+                peak_bytes=peak_bytes)
+  result.update(stats.to_dict())
+  return result
+
+def benchmark_graph(kind, nodes, algorithms, args, workdir):
+  """Generate a graph and benchmark every algorithm on it.
+
+  Args:
+    kind: One of the `generators.GENERATORS`
+    nodes: The number of nodes of the graph
+    algorithms: A list of `path.Algorithms` names
+    args: Parsed args from `argparse.ArgumentParser`.
+    workdir: Directory to write the graph file to
+
+  Returns:
+    A dict with the results of the graph.
+  """
+  graph_file = os.path.join(workdir, f"{kind}{nodes}.txt")
+  num_nodes, num_edges = generators.generate(kind=kind, nodes=nodes, graph_file=graph_file,
+                                              seed=args.seed)
+  graph, phases, peak_bytes = load_graph(graph_file)
+  logging.info(f"{kind} graph: {num_nodes} nodes, {num_edges} edges, "
+               f"parse {phases['parse']:.3f}s, build {phases['build']:.3f}s")
+  queries = random_queries(graph, args.queries, seed=args.seed)
+  results = []
+  for alg in algorithms:
+    index, preprocess_seconds = build_index(graph, alg, args.landmarks)
+    result = benchmark_algorithm(graph, alg, queries, index, args.budget, args.growth)
+    result["preprocess_seconds"] = round(preprocess_seconds, 6)
+    logging.info(f"  {alg:8} {result['queries']:5} queries  "
+                 f"{result['seconds_per_query'] * 1000:10.3f} ms/query  "
+                 f"{result['expansions_per_second']:10} expansions/s  "
+                 f"{result['peak_bytes'] / 2**20:8.2f} MiB peak")
+    results.append(result)
+  os.remove(graph_file)
+  return dict(kind=kind, nodes=num_nodes, edges=num_edges,
+              parse_seconds=round(phases["parse"], 6), build_seconds=round(phases["build"], 6),
+              load_peak_bytes=peak_bytes, algorithms=results)
+
+def compare(results, baseline):
+  """Compare the time per query of two benchmark runs.
+
+  Args:
+    results: The results of this run
+    baseline: The results of an earlier run
+
+  Returns:
+    A list of (kind, nodes, algorithm, ratio) tuples for the cases which
+    are slower than the baseline by more than `REGRESSION_RATIO`.
+  """
+  before = {}
+  for graph in baseline["graphs"]:
+    for result in graph["algorithms"]:
+      before[(graph["kind"], graph["nodes"], result["algorithm"])] = result["seconds_per_query"]
+  regressions = []
+  for graph in results["graphs"]:
+    for result in graph["algorithms"]:
+      key = (graph["kind"], graph["nodes"], result["algorithm"])
+      if before.get(key) and result["seconds_per_query"] / before[key] > REGRESSION_RATIO:
+        regressions.append(key + (round(result["seconds_per_query"] / before[key], 2),))
+  return regressions
+
+def create_parser():
+  """Creates the argument parses for controlling the program runs
+
+  Returns: An instance of `argparse.ArgumentParser`.
+  """
+  parser = argparse.ArgumentParser(
+    description="Benchmark the search algorithms on synthetic graphs"
+  )
+  parser.add_argument('-kinds', action='store', default=",".join(generators.GENERATORS),
+                      help="Comma separated kinds of graphs, of: "
+                           f"{', '.join(generators.GENERATORS)} (default: all)")
+  parser.add_argument('-sizes', action='store', default="1000,10000",
+                      help="Comma separated numbers of nodes (default: 1000,10000)")
+  parser.add_argument('-algs', action='store', default="BFS,ID,ASTAR,IDASTAR",
+                      help=f"Comma separated algorithms, of: {path.ALGORITHM_NAMES} "
+                           "(default: BFS,ID,ASTAR,IDASTAR)")
+  parser.add_argument('-queries', type=int, action='store', default=20,
+                      help="Number of random queries per graph (default: 20)")
+  parser.add_argument('-budget', type=float, action='store', default=30.0,
+                      help="Seconds per algorithm and graph after which no more "
+                           "queries are started (default: 30)")
+  parser.add_argument('-landmarks', type=int, action='store', default=16,
+                      help="Number of landmarks for ALT (default: 16)")
+  parser.add_argument('-growth', type=float, action='store', default=0.1,
+                      help="Minimum relative growth of the bound for IDASTAR (default: 0.1)")
+  parser.add_argument('-seed', type=int, action='store', default=0,
+                      help="Seed of the graphs and the queries (default: 0)")
+  parser.add_argument('-output', action='store', default="benchmark.json",
+                      help="Path of the JSON results (default: benchmark.json)")
+  parser.add_argument('-baseline', action='store',
+                      help="Path of the JSON results of an earlier run to compare with")
+  return parser
+
+def validate_args(args):
+  """Validate the arguments provided to the program
+
+  Args:
+    args: Parsed args from `argparse.ArgumentParser`.
+
+  Returns:
+    The tuple (kinds, sizes, algorithms) of lists.
+  """
+  kinds = args.kinds.split(",")
+  for kind in kinds:
+    if kind not in generators.GENERATORS:
+      logging.error(f"-kinds should be of: {', '.join(generators.GENERATORS)}")
+      sys.exit()
+  try:
+    sizes = [int(size) for size in args.sizes.split(",")]
+  except ValueError:
+    sizes = []
+  if not sizes or min(sizes) < 2:
+    logging.error("-sizes should be a comma separated list of integers greater than 1")
+    sys.exit()
+  algorithms = args.algs.split(",")
+  for alg in algorithms:
+    if alg not in path.ALGORITHM_NAMES.split(", "):
+      logging.error(f"-algs should be of: {path.ALGORITHM_NAMES}")
+      sys.exit()
+  if args.queries < 1:
+    logging.error("-queries should be a positive integer")
+    sys.exit()
+  if args.growth < 0:
+    logging.error("-growth should not be negative")
+    sys.exit()
+  if args.baseline and not os.path.isfile(args.baseline):
+    logging.error(f"-baseline {args.baseline} is not a file")
+    sys.exit()
+  return kinds, sizes, algorithms
+
+
+if __name__ == "__main__":
+
+  args = create_parser().parse_args()
+  logging.basicConfig(level=logging.INFO, format='%(message)s')
+  kinds, sizes, algorithms = validate_args(args=args)
+  results = dict(
+    environment=dict(python=platform.python_version(), numpy=np.__version__,
+                     platform=platform.platform(),
+                     date=datetime.datetime.now().isoformat(timespec="seconds")),
+    config=dict(queries=args.queries, budget=args.budget, landmarks=args.landmarks,
+                growth=args.growth, seed=args.seed),
+    graphs=[]
+  )
+  with tempfile.TemporaryDirectory() as workdir:
+    for kind in kinds:
+      for nodes in sizes:
+        results["graphs"].append(benchmark_graph(kind, nodes, algorithms, args, workdir))
+  with open(args.output, "w") as f:
+    json.dump(results, f, indent=2)
+  logging.info(f"Results written to {args.output}")
+  if args.baseline:
+    with open(args.baseline, "r") as f:
+      baseline = json.load(f)
+    if baseline["config"] != results["config"]:
+      logging.warning(f"The configuration of {args.baseline} differs: {baseline['config']}")
+    regressions = compare(results, baseline)
+    for kind, nodes, alg, ratio in regressions:
+      logging.warning(f"Regression: {alg} on the {kind} graph with {nodes} nodes "
+                      f"is {ratio}x slower than the baseline")
+    if not regressions:
+      logging.info(f"No regressions against {args.baseline}")
@@ -7,87 +7,157 @@
 The following module maintains common data structures and functions
 for implementing the algorithms.
 """
+import array
 import math
-import logging
+import os
 import re
-import sys
 
-def is_alphanumeric(token):
-  """Checks if a token is alphamumeric or not:
+import numpy as np
 
-  Args:
-    token: a string to validate
+# Pattern of valid node names
+ALPHANUMERIC = re.compile(pattern="[a-zA-Z0-9]+")
+
+class GraphError(ValueError):
+  """Raised when a graph or a graph file is invalid"""
+
+def file_stamp(path):
+  """The (mtime, size) of a file, used to detect stale derived files
+  such as the preprocessed search indices stored next to a graph file.
 
   Returns:
-    A boolean
-
-  Examples:
-    is_alphanumeric("abcd") -> True
-    is_alphanumeric("1212") -> True
-    is_alphanumeric("abc121d") -> True
-    is_alphanumeric("abcd$#") -> False
-    is_alphanumeric("$1dx") -> False
+    A numpy array of two integers.
+  """
+  stat = os.stat(path)
+  return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+def _rounded_distance(dx, dy):
+  """The euclidean distances for arrays of co-ordinate differences,
+  rounded to 2 decimals.
   """
-  pattern = "^[a-zA-Z0-9]*$"
-  pattern_obj = re.compile(pattern=pattern)
-  if not token:
-    return False
-  if(re.search(pattern_obj, token)):
-    return True
-  return False
+  dx = dx.astype(np.float64)
+  dy = dy.astype(np.float64)
+  return np.round(np.sqrt(dx**2 + dy**2), 2)
 
-def euclidean_distance(node1, node2):
-  """Calculate the euclidean distance between two nodes
+def _component_labels(num_nodes, sources, targets):
+  """Label the connected components of a graph with a vectorized
+  union-find.
+
+  Every round hooks the root of each edge's larger endpoint to the root
+  of its smaller endpoint (roots only ever point to smaller ids) and then
+  compresses all the paths by pointer jumping, until no edge joins two
+  different roots.
 
   Args:
-    node1: start node of type `Node`.
-    node2: destination node of type `Node`.
+    num_nodes: The number of nodes
+    sources: An array of the first node id of every edge
+    targets: An array of the second node id of every edge
 
-  Returns: euclidean distance between the two nodes
+  Returns:
+    An array of component labels, numbered from 0, indexed by node id.
   """
-  return round(math.sqrt((node1.x - node2.x)**2 + (node1.y - node2.y)**2), 2)
+  parent = np.arange(num_nodes, dtype=np.int64)
+  while True:
+    root1 = parent[sources]
+    root2 = parent[targets]
+    split = root1 != root2
+    if not split.any():
+      break
+    root1 = root1[split]
+    root2 = root2[split]
+    np.minimum.at(parent, np.maximum(root1, root2), np.minimum(root1, root2))
+    while True:
+      grandparent = parent[parent]
+      if np.array_equal(grandparent, parent):
+        break
+      parent = grandparent
+  _, labels = np.unique(parent, return_inverse=True)
+  return labels.astype(np.int64)
 
-class Node():
-  """A class to represent the nodes of a graph
+class Graph():
+  """A class to represent graphs along with helper functionality.
 
-  Args:
-    name: The name of the node
-    x: X co-ordinate of the node
-    y: Y co-ordinate of the node
+  Node names are interned to integer ids and the adjacency is stored
+  in compressed sparse row (CSR) form. Nodes and edges are buffered by
+  `add_node` and `add_edge`, and the arrays are built in a single sort
+  by `finalize`. An edge may be added before its nodes, as long as they
+  are all added before `finalize`:
+
+  - `names[i]` is the name of the node with id `i` and `index` maps the
+    names back to their ids. Ids follow the sorted order of the names.
+  - `x[i]`, `y[i]` are the co-ordinates of the node with id `i`.
+  - the neighbours of the node with id `i` are
+    `neighbours[offsets[i]:offsets[i+1]]`, sorted by id, and
+    `weights[offsets[i]:offsets[i+1]]` holds the (rounded) euclidean
+    lengths of the corresponding edges.
+  - `components[i]` is the label of the connected component of the node
+    with id `i`, so two nodes are connected iff their labels are equal.
   """
-  def __init__(self, name, x, y) -> None:
-    self.name = name
-    self.x = x
-    self.y = y
-    self._parse_args()
-
-  def _parse_args(self):
-    """Validate the input args"""
-    try:
-      self.x = int(self.x)
-      self.y = int(self.y)
-    except ValueError:
-      logging.error(f"Non-integral co-ordinates found for node: {self.name}")
-      sys.exit()
+  def __init__(self) -> None:
+    self.names = []
+    self.index = {}
+    self.x = None
+    self.y = None
+    self.offsets = None
+    self.neighbours = None
+    self.weights = None
+    self.components = None
+    self._xs = array.array("q")
+    self._ys = array.array("q")
+    self._declared = array.array("b")
+    self._src = array.array("q")
+    self._dst = array.array("q")
 
-  def __str__(self) -> str:
-    return self.name
+  @classmethod
+  def from_arrays(cls, names, x, y, offsets, neighbours, weights, components):
+    """Create a finalized graph from the arrays built by `finalize`,
+    e.g. when loading a snapshot.
 
-  def __repr__(self) -> str:
-    return self.name
+    Args:
+      names: A list of node names, sorted
+      x: X co-ordinates indexed by node id
+      y: Y co-ordinates indexed by node id
+      offsets: CSR offsets of the adjacency
+      neighbours: CSR neighbours of the adjacency
+      weights: Weights of the edges in `neighbours`
+      components: Connected component labels indexed by node id
 
-  def __hash__(self) -> int:
-    return hash(self.name)
+    Returns:
+      An instance of `Graph`.
+    """
+    graph = cls()
+    graph.names = names
+    graph.index = {name: idx for idx, name in enumerate(names)}
+    graph.x = x
+    graph.y = y
+    graph.offsets = offsets
+    graph.neighbours = neighbours
+    graph.weights = weights
+    graph.components = components
+    return graph
 
-class Graph():
-  """A class to represent graphs along with helper functionality."""
-  def __init__(self) -> None:
-    self.g = {}
-    self.nodes = {}
+  def __len__(self) -> int:
+    return len(self.names)
 
   def get_node_names(self):
     """Return a list of node names"""
-    return list(self.nodes.keys())
+    return self.names
+
+  def has_node(self, name):
+    """Check if a node with the given name is present in the graph"""
+    return name in self.index
+
+  def _intern(self, name):
+    """Return the id of a node name, reserving a new id (for a node
+    which is not added yet) if needed.
+    """
+    idx = self.index.get(name)
+    if idx is None:
+      idx = self.index[name] = len(self.names)
+      self.names.append(name)
+      self._xs.append(0)
+      self._ys.append(0)
+      self._declared.append(0)
+    return idx
 
   def add_node(self, name, x, y):
     """Add a node to the graph
@@ -96,29 +166,115 @@ class Graph():
       name: The name of the node
       x: X co-ordinate of the node
       y: Y co-ordinate of the node
+
+    Raises:
+      GraphError: if the node already exists or if the co-ordinates
+        are not integers.
     """
-    if name in self.get_node_names():
-      logging.error(f"A node with the name {name} has already been added "
-                    "to the graph.")
-      sys.exit()
-    node = Node(name=name, x=x, y=y)
-    self.g[name] = []
-    self.nodes[name] = node
+    try:
+      x = int(x)
+      y = int(y)
+    except ValueError:
+      raise GraphError(f"Non-integral co-ordinates found for node: {name}") from None
+    idx = self._intern(name)
+    if self._declared[idx]:
+      raise GraphError(f"A node with the name {name} has already been added "
+                       "to the graph.")
+    self._xs[idx] = x
+    self._ys[idx] = y
+    self._declared[idx] = 1
 
   def add_edge(self, name1, name2):
-    """Add an undirected edge from Node(name1,...) -- Node(name2, ...)
+    """Add an undirected edge between the nodes `name1` and `name2`
 
     Args:
       name1: Name of the first node
       name2: Name of the second node
     """
-    if name1 not in self.get_node_names():
-      logging.error(f"Node: {name1} is not present in the graph to add an edge")
-      sys.exit()
-    if name2 not in self.get_node_names():
-      logging.error(f"Node: {name2} is not present in the graph to add an edge")
-      sys.exit()
-    self.g[name1].append(name2)
-    self.g[name1] = sorted(self.g[name1])
-    self.g[name2].append(name1)
-    self.g[name2] = sorted(self.g[name2])
+    self._src.append(self._intern(name1))
+    self._dst.append(self._intern(name2))
+
+  def finalize(self):
+    """Build the CSR adjacency and co-ordinate arrays.
+
+    Node ids are re-labelled to follow the sorted order of the names,
+    so that neighbours are visited in the same (alphabetical) order as
+    the names. Duplicate edges are dropped.
+
+    Returns:
+      The graph itself.
+
+    Raises:
+      GraphError: if an edge refers to a node which was never added.
+    """
+    if 0 in self._declared:
+      name = self.names[self._declared.index(0)]
+      raise GraphError(f"Node: {name} is not present in the graph to add an edge")
+    num_nodes = len(self.names)
+    order = np.array(sorted(range(num_nodes), key=self.names.__getitem__),
+                     dtype=np.int64)
+    rank = np.empty(num_nodes, dtype=np.int64)
+    rank[order] = np.arange(num_nodes, dtype=np.int64)
+    self.names = [self.names[i] for i in order]
+    self.index = {name: idx for idx, name in enumerate(self.names)}
+    self.x = np.frombuffer(self._xs, dtype=np.int64)[order]
+    self.y = np.frombuffer(self._ys, dtype=np.int64)[order]
+
+    src = rank[np.frombuffer(self._src, dtype=np.int64)]
+    dst = rank[np.frombuffer(self._dst, dtype=np.int64)]
+    # Both directions of every edge, sorted and de-duplicated in one pass
+    keys = np.concatenate((src * num_nodes + dst, dst * num_nodes + src))
+    keys.sort()
+    unique = np.ones(len(keys), dtype=bool)
+    unique[1:] = keys[1:] != keys[:-1]
+    keys = keys[unique]
+    self.neighbours = keys % max(num_nodes, 1)
+    self.offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // max(num_nodes, 1), minlength=num_nodes),
+              out=self.offsets[1:])
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int64),
+                        np.diff(self.offsets))
+    self.weights = _rounded_distance(self.x[sources] - self.x[self.neighbours],
+                                     self.y[sources] - self.y[self.neighbours])
+    self.components = _component_labels(num_nodes, sources, self.neighbours)
+
+    self._xs = array.array("q")
+    self._ys = array.array("q")
+    self._declared = array.array("b")
+    self._src = array.array("q")
+    self._dst = array.array("q")
+    return self
+
+  def neighbours_of(self, idx):
+    """Return the array of neighbour ids of the node with id `idx`"""
+    return self.neighbours[self.offsets[idx]:self.offsets[idx + 1]]
+
+  def connected(self, idx1, idx2):
+    """Check if the nodes with ids `idx1` and `idx2` are in the same
+    connected component, in O(1)
+    """
+    return self.components[idx1] == self.components[idx2]
+
+  def edges_of(self, idx):
+    """Return the arrays of neighbour ids and edge weights of the node
+    with id `idx`
+    """
+    lo, hi = self.offsets[idx], self.offsets[idx + 1]
+    return self.neighbours[lo:hi], self.weights[lo:hi]
+
+  def heuristic_to(self, goal):
+    """Euclidean distances from every node to the node with id `goal`,
+    computed in a single vectorized pass.
+
+    Returns:
+      A numpy array of distances indexed by node id.
+    """
+    return _rounded_distance(self.x - self.x[goal], self.y - self.y[goal])
+
+  def distance(self, idx1, idx2):
+    """Euclidean distance between the nodes with ids `idx1` and `idx2`,
+    rounded the same way as `heuristic_to`.
+    """
+    dx = int(self.x[idx1]) - int(self.x[idx2])
+    dy = int(self.y[idx1]) - int(self.y[idx2])
+    return round(math.sqrt(dx**2 + dy**2), 2)
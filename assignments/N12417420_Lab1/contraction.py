@@ -0,0 +1,277 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module implements the preprocessing for contraction
+hierarchies (CH).
+
+The nodes of a graph are contracted one at a time in the order of their
+importance. Contracting a node `v` removes it from the remaining graph
+and adds a shortcut edge `u -- w` (with `v` as its middle node) for every
+pair of neighbours whose only shortest path runs through `v`. A query then
+only needs to search the edges leading to more important nodes, from both
+the start and the goal (see `search.ch`).
+"""
+import heapq
+import logging
+import math
+
+import numpy as np
+
+from common import file_stamp
+
+# Maximum number of nodes settled by a single witness search
+WITNESS_SETTLE_LIMIT = 200
+
+# Middle node of the edges which are not shortcuts
+NO_MIDDLE = -1
+
+class ContractionHierarchy():
+  """A class to hold the upward graph of a contraction hierarchy.
+
+  The upward edges of the node with id `v` lead to more important nodes
+  and are stored in CSR form, sorted by id:
+  `neighbours[offsets[v]:offsets[v+1]]` along with the `weights` and the
+  `middles` (node contracted to create a shortcut, or `NO_MIDDLE`) of
+  the edges.
+
+  Args:
+    rank: An array with the contraction order of every node
+    offsets: CSR offsets of the upward edges
+    neighbours: CSR neighbours of the upward edges
+    weights: Weights of the upward edges
+    middles: Middle nodes of the upward edges
+  """
+  def __init__(self, rank, offsets, neighbours, weights, middles) -> None:
+    self.rank = rank
+    self.offsets = offsets
+    self.neighbours = neighbours
+    self.weights = weights
+    self.middles = middles
+
+  def upward_edges(self, node):
+    """Return the arrays of upward neighbour ids and edge weights of the
+    node with id `node`
+    """
+    lo, hi = self.offsets[node], self.offsets[node + 1]
+    return self.neighbours[lo:hi], self.weights[lo:hi]
+
+  def middle(self, node1, node2):
+    """Return the middle node of the edge `node1 -- node2`, or
+    `NO_MIDDLE` if it is an edge of the original graph
+    """
+    if self.rank[node1] > self.rank[node2]:
+      node1, node2 = node2, node1
+    lo, hi = self.offsets[node1], self.offsets[node1 + 1]
+    position = lo + np.searchsorted(self.neighbours[lo:hi], node2)
+    return int(self.middles[position])
+
+  def unpack(self, path):
+    """Replace the shortcuts of a path by the edges they stand for.
+
+    Args:
+      path: A list of node ids joined by upward (or downward) edges
+
+    Returns:
+      A list of node ids joined by edges of the original graph.
+    """
+    unpacked = [path[0]]
+    stack = [(path[i], path[i + 1]) for i in reversed(range(len(path) - 1))]
+    while stack:
+      node1, node2 = stack.pop()
+      middle = self.middle(node1, node2)
+      if middle == NO_MIDDLE:
+        unpacked.append(node2)
+      else:
+        stack.append((middle, node2))
+        stack.append((node1, middle))
+    return unpacked
+
+def _witness_search(adjacency, source, excluded, targets, limit, max_settled):
+  """A Dijkstra search from `source` which avoids the node `excluded`.
+
+  The search stops once every target is settled, the distance exceeds
+  `limit` or `max_settled` nodes are settled.
+
+  Returns:
+    A dict of the distances to the settled nodes.
+  """
+  distances = {source: 0}
+  settled = {}
+  remaining = len(targets)
+  p_queue = [(0, source)]
+  while p_queue and remaining and len(settled) < max_settled:
+    distance, node = heapq.heappop(p_queue)
+    if node in settled:
+      continue
+    if distance > limit:
+      break
+    settled[node] = distance
+    if node in targets:
+      remaining -= 1
+    for neighbour, (weight, _) in adjacency[node].items():
+      if neighbour == excluded or neighbour in settled:
+        continue
+      new_distance = round(distance + weight, 2)
+      if new_distance < distances.get(neighbour, math.inf):
+        distances[neighbour] = new_distance
+        heapq.heappush(p_queue, (new_distance, neighbour))
+  return settled
+
+def _shortcuts(adjacency, node, max_settled):
+  """Find the shortcuts needed to contract `node`.
+
+  Returns:
+    A list of (u, w, weight) tuples, one for every pair of neighbours
+    `u`, `w` whose shortest path (without a witness) runs through `node`.
+  """
+  neighbours = list(adjacency[node].items())
+  shortcuts = []
+  for i, (node1, (weight1, _)) in enumerate(neighbours):
+    targets = {node2: round(weight1 + weight2, 2)
+               for node2, (weight2, _) in neighbours[i + 1:]}
+    if not targets:
+      continue
+    witnesses = _witness_search(adjacency, node1, node, targets,
+                                max(targets.values()), max_settled)
+    for node2, weight in targets.items():
+      if witnesses.get(node2, math.inf) > weight:
+        shortcuts.append((node1, node2, weight))
+  return shortcuts
+
+def build_hierarchy(graph, max_settled=WITNESS_SETTLE_LIMIT):
+  """Contract all the nodes of a graph and build its upward graph.
+
+  The nodes are ordered by their edge difference (shortcuts added minus
+  edges removed) plus the number of their neighbours contracted so far,
+  with lazy updates: a popped node is only contracted if its recomputed
+  priority is still the smallest.
+
+  Args:
+    graph: An instance of `common.Graph`
+    max_settled: Maximum number of nodes settled by a witness search.
+
+  Returns:
+    An instance of `ContractionHierarchy`.
+  """
+  num_nodes = len(graph)
+  # adjacency[v] maps every remaining neighbour to (weight, middle)
+  adjacency = []
+  for node in range(num_nodes):
+    neighbours, weights = graph.edges_of(node)
+    adjacency.append({neighbour: (weight, NO_MIDDLE)
+                      for neighbour, weight in zip(neighbours.tolist(), weights.tolist())
+                      if neighbour != node})
+  contracted_neighbours = [0] * num_nodes
+  rank = np.full(num_nodes, -1, dtype=np.int64)
+  up_edges = []
+
+  def priority(node, shortcuts):
+    return len(shortcuts) - len(adjacency[node]) + contracted_neighbours[node]
+
+  p_queue = []
+  for node in range(num_nodes):
+    p_queue.append((priority(node, _shortcuts(adjacency, node, max_settled)), node))
+  heapq.heapify(p_queue)
+
+  order = 0
+  while p_queue:
+    _, node = heapq.heappop(p_queue)
+    if rank[node] >= 0:
+      continue
+    shortcuts = _shortcuts(adjacency, node, max_settled)
+    current_priority = priority(node, shortcuts)
+    if p_queue and current_priority > p_queue[0][0]:
+      heapq.heappush(p_queue, (current_priority, node))
+      continue
+
+    rank[node] = order
+    order += 1
+    for neighbour, (weight, middle) in adjacency[node].items():
+      up_edges.append((node, neighbour, weight, middle))
+    for node1, node2, weight in shortcuts:
+      if weight < adjacency[node1].get(node2, (math.inf,))[0]:
+        adjacency[node1][node2] = (weight, node)
+        adjacency[node2][node1] = (weight, node)
+    for neighbour in adjacency[node]:
+      del adjacency[neighbour][node]
+      contracted_neighbours[neighbour] += 1
+    adjacency[node] = {}
+    if order % 10000 == 0:
+      logging.debug(f"Contracted {order} of {num_nodes} nodes")
+
+  logging.debug(f"Contraction added {len(up_edges) - len(graph.neighbours) // 2} shortcuts")
+  up_edges.sort()
+  sources = np.array([edge[0] for edge in up_edges], dtype=np.int64)
+  offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+  np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+  return ContractionHierarchy(
+    rank=rank,
+    offsets=offsets,
+    neighbours=np.array([edge[1] for edge in up_edges], dtype=np.int64),
+    weights=np.array([edge[2] for edge in up_edges], dtype=np.float64),
+    middles=np.array([edge[3] for edge in up_edges], dtype=np.int64)
+  )
+
+def hierarchy_path(graph_file):
+  """Path of the contraction hierarchy stored next to a graph file"""
+  return f"{graph_file}.ch.npz"
+
+def save_hierarchy(hierarchy, graph_file):
+  """Store a contraction hierarchy next to its graph file
+
+  Args:
+    hierarchy: An instance of `ContractionHierarchy`
+    graph_file: Path to the graph input the hierarchy was built for
+  """
+  with open(hierarchy_path(graph_file), "wb") as f:
+    np.savez(f, rank=hierarchy.rank, offsets=hierarchy.offsets,
+             neighbours=hierarchy.neighbours, weights=hierarchy.weights,
+             middles=hierarchy.middles, stamp=file_stamp(graph_file))
+
+def load_hierarchy(graph_file, graph):
+  """Load the contraction hierarchy stored next to a graph file.
+
+  Args:
+    graph_file: Path to the graph input
+    graph: The instance of `common.Graph` read from `graph_file`
+
+  Returns:
+    An instance of `ContractionHierarchy`, or None if there is no
+    hierarchy or if it is stale.
+  """
+  try:
+    with np.load(hierarchy_path(graph_file)) as data:
+      if (not np.array_equal(data["stamp"], file_stamp(graph_file))
+          or data["rank"].shape != (len(graph),)):
+        logging.debug("Contraction hierarchy is stale")
+        return None
+      return ContractionHierarchy(rank=data["rank"], offsets=data["offsets"],
+                                  neighbours=data["neighbours"], weights=data["weights"],
+                                  middles=data["middles"])
+  except (OSError, KeyError, ValueError):
+    return None
+
+def load_or_build_hierarchy(graph_file, graph):
+  """Load the contraction hierarchy of a graph file, or build and
+  store it if it is missing or stale.
+
+  Args:
+    graph_file: Path to the graph input
+    graph: The instance of `common.Graph` read from `graph_file`
+
+  Returns:
+    An instance of `ContractionHierarchy`.
+  """
+  hierarchy = load_hierarchy(graph_file, graph)
+  if hierarchy is None:
+    logging.debug("Building the contraction hierarchy")
+    hierarchy = build_hierarchy(graph)
+    try:
+      save_hierarchy(hierarchy, graph_file)
+    except OSError:
+      logging.debug(f"Unable to store the contraction hierarchy at "
+                    f"{hierarchy_path(graph_file)}")
+  return hierarchy
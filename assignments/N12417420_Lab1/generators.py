@@ -0,0 +1,241 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module generates synthetic graphs in the Lab1 graph file
+format, to benchmark the search algorithms on inputs of any size:
+- grid: a jittered grid where a few of the edges are missing
+- geometric: a random geometric graph, where nodes closer than a radius
+  are joined
+- road: a road-like network of local streets (a random spanning tree of
+  a jittered grid with a few extra streets) and straight arterial roads
+
+Every generator returns the tuple (x, y, edges) of integer arrays, where
+`edges` has one row per undirected edge. The node with id `i` is named
+`N<i>`.
+"""
+import argparse
+import logging
+import math
+import sys
+
+import numpy as np
+
+# Distance between two neighbouring points of the grid based graphs
+GRID_SPACING = 10
+
+# Fraction of the edges of a `grid_graph` which are removed
+GRID_MISSING_EDGES = 0.1
+
+# Average degree aimed at by `geometric_graph`
+GEOMETRIC_DEGREE = 6
+
+# Every these many rows and columns of a `road_graph` are arterial roads
+ROAD_ARTERIAL_SPACING = 8
+
+# Fraction of the grid edges added to a `road_graph` as extra streets
+ROAD_EXTRA_STREETS = 0.15
+
+def _grid_points(nodes, rng):
+  """The co-ordinates of a square grid of at least `nodes` points,
+  jittered by up to a third of the spacing.
+
+  Returns:
+    The tuple (side, x, y), where the point at row `i` and column `j`
+    has the id `i * side + j`.
+  """
+  side = max(1, math.ceil(math.sqrt(nodes)))
+  rows, columns = np.divmod(np.arange(side * side, dtype=np.int64), side)
+  jitter = GRID_SPACING // 3
+  x = columns * GRID_SPACING + rng.integers(-jitter, jitter + 1, size=side * side)
+  y = rows * GRID_SPACING + rng.integers(-jitter, jitter + 1, size=side * side)
+  return side, x, y
+
+def _grid_edges(side):
+  """All the (right, down) edges of a square grid
+
+  Returns:
+    The tuple (horizontal, vertical) of (m, 2) edge arrays.
+  """
+  ids = np.arange(side * side, dtype=np.int64).reshape(side, side)
+  horizontal = np.stack((ids[:, :-1].ravel(), ids[:, 1:].ravel()), axis=1)
+  vertical = np.stack((ids[:-1, :].ravel(), ids[1:, :].ravel()), axis=1)
+  return horizontal, vertical
+
+def grid_graph(nodes, seed=0):
+  """A jittered square grid with `GRID_MISSING_EDGES` of its edges
+  removed at random.
+
+  Args:
+    nodes: The minimum number of nodes (rounded up to a square)
+    seed: Seed of the random number generator
+
+  Returns:
+    The tuple (x, y, edges).
+  """
+  rng = np.random.default_rng(seed)
+  side, x, y = _grid_points(nodes, rng)
+  edges = np.concatenate(_grid_edges(side))
+  edges = edges[rng.random(len(edges)) >= GRID_MISSING_EDGES]
+  return x, y, edges
+
+def geometric_graph(nodes, seed=0):
+  """A random geometric graph: the nodes are placed uniformly at random
+  in a square and every two nodes closer than a radius are joined. The
+  radius is chosen for an average degree of `GEOMETRIC_DEGREE`.
+
+  Args:
+    nodes: The number of nodes
+    seed: Seed of the random number generator
+
+  Returns:
+    The tuple (x, y, edges).
+  """
+  rng = np.random.default_rng(seed)
+  extent = max(1, math.ceil(math.sqrt(nodes)) * GRID_SPACING)
+  x = rng.integers(0, extent, size=nodes)
+  y = rng.integers(0, extent, size=nodes)
+  radius = math.sqrt(GEOMETRIC_DEGREE * extent**2 / (math.pi * max(nodes, 1)))
+
+  # Bucket the nodes into square cells of side `radius`, so only the
+  # nodes of the same or of an adjacent cell can be joined
+  cells_per_side = max(1, math.ceil(extent / radius))
+  cell_x = np.minimum(x // radius, cells_per_side - 1).astype(np.int64)
+  cell_y = np.minimum(y // radius, cells_per_side - 1).astype(np.int64)
+  cell = cell_y * cells_per_side + cell_x
+  order = np.argsort(cell, kind="stable")
+  bounds = np.searchsorted(cell[order], np.arange(cells_per_side**2 + 1))
+
+  edges = []
+  for cy in range(cells_per_side):
+    for cx in range(cells_per_side):
+      own = order[bounds[cy * cells_per_side + cx]:bounds[cy * cells_per_side + cx + 1]]
+      if not len(own):
+        continue
+      # The same cell and the adjacent cells after it, so every pair of
+      # cells is compared once
+      for dx, dy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        nx, ny = cx + dx, cy + dy
+        if not (0 <= nx < cells_per_side and ny < cells_per_side):
+          continue
+        other = order[bounds[ny * cells_per_side + nx]:bounds[ny * cells_per_side + nx + 1]]
+        distances = np.hypot(x[own][:, np.newaxis] - x[other], y[own][:, np.newaxis] - y[other])
+        close = distances <= radius
+        if dx == 0 and dy == 0:
+          close = np.triu(close, k=1)
+        i, j = np.nonzero(close)
+        edges.append(np.stack((own[i], other[j]), axis=1))
+  edges = np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+  return x, y, edges
+
+def road_graph(nodes, seed=0):
+  """A road-like network on a jittered square grid.
+
+  The local streets are a random spanning tree of the grid (every point
+  is joined to the point above or to its left), so the graph is
+  connected but full of detours, plus `ROAD_EXTRA_STREETS` of the other
+  grid edges. Every `ROAD_ARTERIAL_SPACING`-th row and column is an
+  arterial road with all its edges.
+
+  Args:
+    nodes: The minimum number of nodes (rounded up to a square)
+    seed: Seed of the random number generator
+
+  Returns:
+    The tuple (x, y, edges).
+  """
+  rng = np.random.default_rng(seed)
+  side, x, y = _grid_points(nodes, rng)
+  horizontal, vertical = _grid_edges(side)
+  rows, columns = np.divmod(np.arange(side * side, dtype=np.int64), side)
+
+  # The spanning tree: the edge to the left or up of every point
+  # but the first (`horizontal` has no edge for column 0, `vertical`
+  # none for row 0)
+  go_left = (rng.random(side * side) < 0.5) | (rows == 0)
+  go_left &= columns > 0
+  go_up = ~go_left & (rows > 0)
+  left = np.zeros(len(horizontal), dtype=bool)
+  left[(rows * (side - 1) + columns - 1)[go_left]] = True
+  up = np.zeros(len(vertical), dtype=bool)
+  up[((rows - 1) * side + columns)[go_up]] = True
+
+  horizontal_keep = left | (rng.random(len(horizontal)) < ROAD_EXTRA_STREETS)
+  horizontal_keep |= rows[horizontal[:, 0]] % ROAD_ARTERIAL_SPACING == 0
+  vertical_keep = up | (rng.random(len(vertical)) < ROAD_EXTRA_STREETS)
+  vertical_keep |= columns[vertical[:, 0]] % ROAD_ARTERIAL_SPACING == 0
+  edges = np.concatenate((horizontal[horizontal_keep], vertical[vertical_keep]))
+  return x, y, edges
+
+GENERATORS = {
+  "grid": grid_graph,
+  "geometric": geometric_graph,
+  "road": road_graph,
+}
+
+def write_graph(graph_file, x, y, edges, comment=None):
+  """Write a generated graph in the Lab1 graph file format.
+
+  Args:
+    graph_file: Path of the graph file to write
+    x: An array of the X co-ordinates indexed by node id
+    y: An array of the Y co-ordinates indexed by node id
+    edges: An (m, 2) array of the node ids of the edges
+    comment: An optional comment for the first line of the file
+  """
+  with open(graph_file, "w") as gf:
+    if comment:
+      gf.write(f"# {comment}\n")
+    for i, (node_x, node_y) in enumerate(zip(x.tolist(), y.tolist())):
+      gf.write(f"N{i} {node_x} {node_y}\n")
+    for node1, node2 in edges.tolist():
+      gf.write(f"N{node1} N{node2}\n")
+
+def generate(kind, nodes, graph_file, seed=0):
+  """Generate a graph of the given kind and write it to a graph file.
+
+  Args:
+    kind: One of the keys of `GENERATORS`
+    nodes: The (minimum) number of nodes
+    graph_file: Path of the graph file to write
+    seed: Seed of the random number generator
+
+  Returns:
+    The tuple (number of nodes, number of edges) of the graph.
+  """
+  x, y, edges = GENERATORS[kind](nodes, seed=seed)
+  write_graph(graph_file, x, y, edges, comment=f"{kind} graph, {len(x)} nodes, "
+                                               f"{len(edges)} edges, seed {seed}")
+  return len(x), len(edges)
+
+def create_parser():
+  """Creates the argument parses for controlling the program runs
+
+  Returns: An instance of `argparse.ArgumentParser`.
+  """
+  parser = argparse.ArgumentParser(
+    description="Generate a synthetic graph file for path.py"
+  )
+  parser.add_argument('-kind', action='store', default="grid",
+                      help=f"One of: {', '.join(GENERATORS)} (default: grid)")
+  parser.add_argument('-nodes', type=int, action='store', default=10000,
+                      help="Number of nodes (default: 10000)")
+  parser.add_argument('-seed', type=int, action='store', default=0,
+                      help="Seed of the random number generator (default: 0)")
+  parser.add_argument('graph_file', action='store', help="Path of the graph file to write")
+  return parser
+
+
+if __name__ == "__main__":
+
+  args = create_parser().parse_args()
+  logging.basicConfig(level=logging.ERROR, format='%(message)s')
+  if args.kind not in GENERATORS:
+    logging.error(f"-kind should be one of: {', '.join(GENERATORS)}")
+    sys.exit()
+  if args.nodes < 1:
+    logging.error("-nodes should be a positive integer")
+    sys.exit()
+  generate(kind=args.kind, nodes=args.nodes, graph_file=args.graph_file, seed=args.seed)
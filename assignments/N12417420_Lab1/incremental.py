@@ -0,0 +1,217 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module implements incremental re-planning with Lifelong
+Planning A* (LPA*) on a graph whose edges change between searches.
+
+The planner keeps, for every node, its cost `g` from the start and the
+one step lookahead `rhs = min(g(p) + c(p, v))` over its neighbours `p`.
+A node is consistent when both are equal. After a batch of edge changes
+only the endpoints of the changed edges become inconsistent, and the
+next search only repairs the nodes whose cost is affected by them,
+expanding them in A* order, instead of searching from scratch.
+
+The `common.Graph` itself is never modified: the added and removed
+edges are kept as an overlay on top of its CSR arrays.
+
+LPA* needs every edge to cost more than nothing, or two nodes joined by
+an edge of length 0 (at the same co-ordinates) can keep each other's
+stale cost after the edge which supported them is removed. The costs
+are therefore (distance, number of edges) pairs, compared in that
+order: the distances are the same as without the edge counts, which
+only break the ties.
+"""
+import heapq
+import math
+
+import tracing
+from common import GraphError
+from search import format_solution
+
+# The (distance, number of edges) cost of the nodes which are not reached
+UNREACHED = (math.inf, 0)
+
+class IncrementalPlanner():
+  """A class to re-plan the path from start to goal while the edges of
+  a graph change.
+
+  Edges are changed with `add_edge` and `remove_edge`, and `plan`
+  repairs the previous search and returns the solution. The heuristic
+  is the euclidean distance to the goal, which stays admissible since
+  every edge (added or not) costs the euclidean distance between its
+  nodes.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+  """
+  def __init__(self, graph, start, goal) -> None:
+    self.graph = graph
+    self.start = graph.index[start]
+    self.goal = graph.index[goal]
+    # Overlay of the changed edges: node -> {neighbour: weight} for the
+    # added edges and node -> set of neighbours for the removed edges
+    self._added = {}
+    self._removed = {}
+    self._changed = []
+    self._heuristic = graph.heuristic_to(self.goal).tolist()
+    self.g = [UNREACHED] * len(graph)
+    self.rhs = [UNREACHED] * len(graph)
+    self.rhs[self.start] = (0, 0)
+    self._queue = [(self._key(self.start), self.start)]
+
+  def has_edge(self, idx1, idx2):
+    """Check if the nodes with ids `idx1` and `idx2` are joined by an
+    edge, after the changes so far
+    """
+    if idx2 in self._added.get(idx1, ()):
+      return True
+    if idx2 in self._removed.get(idx1, ()):
+      return False
+    neighbours = self.graph.neighbours_of(idx1)
+    position = neighbours.searchsorted(idx2)
+    return position < len(neighbours) and neighbours[position] == idx2
+
+  def add_edge(self, name1, name2):
+    """Add an undirected edge between the nodes `name1` and `name2`. Adding
+    an edge which already exists has no effect.
+
+    Raises:
+      GraphError: if a node is not present in the graph.
+    """
+    idx1, idx2 = self._ids(name1, name2)
+    if idx1 == idx2 or self.has_edge(idx1, idx2):
+      return
+    for node, other in ((idx1, idx2), (idx2, idx1)):
+      removed = self._removed.get(node)
+      if removed and other in removed:
+        removed.discard(other)
+      else:
+        self._added.setdefault(node, {})[other] = self.graph.distance(node, other)
+    self._changed.append((idx1, idx2))
+
+  def remove_edge(self, name1, name2):
+    """Remove the undirected edge between the nodes `name1` and `name2`
+
+    Raises:
+      GraphError: if a node is not present in the graph, or if there is
+        no edge between the nodes.
+    """
+    idx1, idx2 = self._ids(name1, name2)
+    if not self.has_edge(idx1, idx2):
+      raise GraphError(f"There is no edge between {name1} and {name2} to remove")
+    for node, other in ((idx1, idx2), (idx2, idx1)):
+      added = self._added.get(node)
+      if added and other in added:
+        del added[other]
+      else:
+        self._removed.setdefault(node, set()).add(other)
+    self._changed.append((idx1, idx2))
+
+  def _ids(self, name1, name2):
+    """The ids of two node names"""
+    for name in (name1, name2):
+      if not self.graph.has_node(name):
+        raise GraphError(f"Node: {name} is not present in the graph")
+    return self.graph.index[name1], self.graph.index[name2]
+
+  def _edges(self, node):
+    """The list of (neighbour, edge cost) pairs of a node, after the
+    changes so far
+    """
+    neighbours, weights = self.graph.edges_of(node)
+    edges = zip(neighbours.tolist(), weights.tolist())
+    removed = self._removed.get(node)
+    if removed:
+      edges = [(neighbour, weight) for neighbour, weight in edges if neighbour not in removed]
+    added = self._added.get(node)
+    if added:
+      return list(edges) + list(added.items())
+    return edges
+
+  def _key(self, node):
+    """The priority of a node: (min(g, rhs) + h, min(g, rhs)), where
+    `h` adds no edges to the cost
+    """
+    distance, edges = min(self.g[node], self.rhs[node])
+    return (round(distance + self._heuristic[node], 2), edges, distance)
+
+  def _update(self, node):
+    """Recompute the `rhs` of a node and queue it if it is inconsistent"""
+    if node != self.start:
+      g = self.g
+      self.rhs[node] = min(((round(g[neighbour][0] + weight, 2), g[neighbour][1] + 1)
+                            for neighbour, weight in self._edges(node)
+                            if g[neighbour] != UNREACHED), default=UNREACHED)
+    if self.g[node] != self.rhs[node]:
+      heapq.heappush(self._queue, (self._key(node), node))
+
+  def _compute(self):
+    """Expand the inconsistent nodes in the order of their keys until
+    the goal is consistent and no queued node can lower its cost.
+
+    Queue entries whose node has since become consistent or changed its
+    key are stale and skipped.
+    """
+    g, rhs, queue = self.g, self.rhs, self._queue
+    tracer = tracing.tracer()
+    while queue:
+      key, node = queue[0]
+      if g[node] == rhs[node] or key != self._key(node):
+        heapq.heappop(queue)
+        continue
+      if key >= self._key(self.goal) and rhs[self.goal] == g[self.goal]:
+        break
+      heapq.heappop(queue)
+      edges = list(self._edges(node))
+      if tracer:
+        tracer.expand(len(edges), "Expanding %s ; g=%s rhs=%s", self.graph.names[node],
+                      g[node][0], rhs[node][0])
+      if g[node] > rhs[node]:
+        g[node] = rhs[node]
+      else:
+        g[node] = UNREACHED
+        self._update(node)
+      for neighbour, _ in edges:
+        self._update(neighbour)
+      if tracer:
+        tracer.push(len(queue))
+
+  def _path(self):
+    """Follow the cheapest predecessors back from the goal. Every step
+    back has one edge less, so the walk always ends at the start.
+
+    Returns:
+      A list of node ids from start to goal, or None if the goal can not
+      be reached.
+    """
+    if self.g[self.goal] == UNREACHED:
+      return None
+    g = self.g
+    path = [self.goal]
+    node = self.goal
+    while node != self.start:
+      node = min(self._edges(node),
+                 key=lambda edge: (round(g[edge[0]][0] + edge[1], 2), g[edge[0]][1]))[0]
+      path.append(node)
+    path.reverse()
+    return path
+
+  def cost(self):
+    """The cost of the current path, `math.inf` if there is none"""
+    return self.g[self.goal][0]
+
+  def plan(self):
+    """Repair the search after the edge changes since the last call and
+    return the solution for the path from start to goal.
+    """
+    for idx1, idx2 in self._changed:
+      self._update(idx1)
+      self._update(idx2)
+    self._changed = []
+    self._compute()
+    return format_solution(self.graph, self._path())
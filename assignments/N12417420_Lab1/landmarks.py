@@ -0,0 +1,175 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module implements the preprocessing for the ALT
+(A*, Landmarks and Triangle inequality) heuristic.
+
+For a landmark `L` and any two nodes `v`, `t` the triangle inequality
+gives `d(v, t) >= |d(L, t) - d(L, v)|`, so the maximum of this bound over
+a set of landmarks is an admissible heuristic which is usually much
+tighter than the euclidean distance on graphs with detours.
+"""
+import logging
+import operator
+
+import numpy as np
+
+import search
+from common import file_stamp
+
+class LandmarkIndex():
+  """A class to hold the distances from a set of landmarks to every
+  node of a graph.
+
+  Args:
+    landmarks: An array of the landmark node ids
+    distances: A (len(landmarks), len(graph)) array where
+      `distances[i][v]` is the shortest path distance from the
+      i-th landmark to the node with id `v` (`np.inf` if unreachable).
+  """
+  def __init__(self, landmarks, distances) -> None:
+    self.landmarks = landmarks
+    self.distances = distances
+
+  def heuristic_to(self, graph, goal):
+    """The ALT heuristic from every node to the node with id `goal`,
+    combined with the euclidean distance.
+
+    Args:
+      graph: The instance of `common.Graph` the index was built for
+      goal: Id of the destination node
+
+    Returns:
+      An instance of `LandmarkHeuristic`, indexed by node id like an
+      array of admissible `h` values. Nodes which can not reach the goal
+      have an infinite `h`.
+    """
+    return LandmarkHeuristic(graph, self.distances, goal)
+
+class LandmarkHeuristic():
+  """The ALT heuristic to one goal, evaluated for a node only when the
+  search first asks for it.
+
+  A search usually reaches a small part of the graph, so building the
+  `h` of every node, a pass over the whole (k, n) distance table, can
+  cost more than the search itself. Only the column of the goal is read
+  up front, and the `h` of every node is cached once computed.
+
+  Args:
+    graph: The instance of `common.Graph` the distances were computed for
+    distances: The distance table of a `LandmarkIndex`
+    goal: Id of the destination node
+  """
+  def __init__(self, graph, distances, goal) -> None:
+    self.graph = graph
+    self.distances = distances
+    self.goal = goal
+    to_goal = distances[:, goal]
+    # A landmark which can not reach the goal bounds nothing (inf - inf)
+    reachable = np.isfinite(to_goal)
+    self.rows = slice(None) if reachable.all() else np.flatnonzero(reachable)
+    self.to_goal = to_goal[self.rows].tolist()
+    self.cache = {}
+
+  def __getitem__(self, node):
+    h = self.cache.get(node)
+    if h is None:
+      to_node = self.distances[self.rows, node].tolist()
+      bound = max(map(abs, map(operator.sub, self.to_goal, to_node)), default=0)
+      h = round(max(bound, self.graph.distance(node, self.goal)), 2)
+      self.cache[node] = h
+    return h
+
+def select_landmarks(graph, k):
+  """Select `k` landmarks by the farthest point heuristic and compute
+  their distance tables.
+
+  The first landmark is the node farthest from node 0, and every next
+  landmark is the node farthest from all the landmarks selected so far.
+  A node which is unreachable from all of them (i.e. in another
+  component) is preferred, so every component gets a landmark.
+
+  Args:
+    graph: An instance of `common.Graph`
+    k: The number of landmarks
+
+  Returns:
+    An instance of `LandmarkIndex`.
+  """
+  k = min(k, len(graph))
+  landmarks = np.empty(k, dtype=np.int64)
+  distances = np.empty((k, len(graph)))
+  if k == 0:
+    return LandmarkIndex(landmarks, distances)
+
+  closest, _ = search.shortest_path_tree(graph, 0)
+  for i in range(k):
+    # Unreachable nodes sort after every finite distance
+    landmark = int(np.argmax(np.where(np.isinf(closest), np.finfo(np.float64).max, closest)))
+    logging.debug(f"Landmark {i}: {graph.names[landmark]}")
+    landmarks[i] = landmark
+    distances[i], _ = search.shortest_path_tree(graph, landmark)
+    closest = distances[i] if i == 0 else np.minimum(closest, distances[i])
+  return LandmarkIndex(landmarks, distances)
+
+def index_path(graph_file):
+  """Path of the landmark index stored next to a graph file"""
+  return f"{graph_file}.landmarks.npz"
+
+def save_index(index, graph_file):
+  """Store a landmark index next to its graph file
+
+  Args:
+    index: An instance of `LandmarkIndex`
+    graph_file: Path to the graph input the index was built for
+  """
+  with open(index_path(graph_file), "wb") as f:
+    np.savez(f, landmarks=index.landmarks, distances=index.distances,
+             stamp=file_stamp(graph_file))
+
+def load_index(graph_file, graph, k):
+  """Load the landmark index stored next to a graph file.
+
+  Args:
+    graph_file: Path to the graph input
+    graph: The instance of `common.Graph` read from `graph_file`
+    k: The number of landmarks expected
+
+  Returns:
+    An instance of `LandmarkIndex`, or None if there is no index or if
+    it is stale.
+  """
+  try:
+    with np.load(index_path(graph_file)) as data:
+      if (not np.array_equal(data["stamp"], file_stamp(graph_file))
+          or data["distances"].shape != (min(k, len(graph)), len(graph))):
+        logging.debug("Landmark index is stale")
+        return None
+      return LandmarkIndex(data["landmarks"], data["distances"])
+  except (OSError, KeyError, ValueError):
+    return None
+
+def load_or_build_index(graph_file, graph, k):
+  """Load the landmark index of a graph file, or build and store it
+  if it is missing or stale.
+
+  Args:
+    graph_file: Path to the graph input
+    graph: The instance of `common.Graph` read from `graph_file`
+    k: The number of landmarks
+
+  Returns:
+    An instance of `LandmarkIndex`.
+  """
+  index = load_index(graph_file, graph, k)
+  if index is None:
+    logging.debug(f"Building a landmark index with {k} landmarks")
+    index = select_landmarks(graph, k)
+    try:
+      save_index(index, graph_file)
+    except OSError:
+      logging.debug(f"Unable to store the landmark index at {index_path(graph_file)}")
+  return index
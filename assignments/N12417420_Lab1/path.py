@@ -5,25 +5,66 @@
 #############################
 """
 The following module provides an interface to leverage:
-- Breadth First Search
-- Iterative Deepending and
+- Breadth First Search, and its level synchronous vectorized variant (BFSVEC)
+- Iterative Deepending
 - A*
+- Iterative Deepening A*
+- anytime repairing A* (ARASTAR) with a time budget
+- A* with landmarks (ALT)
+- contraction hierarchies (CH)
+- Dijkstra's single source shortest path tree (DIJKSTRA) and
+- bidirectional variants of Breadth First Search and A*
 search algorithms to find a path from start node to goal in a graph.
 """
 import argparse
+import contextlib
 import enum
+import json
 import logging
+import multiprocessing
 import sys
 
+import contraction
+import incremental
+import landmarks
 import search
+import snapshot
+import spatial
+import tracing
+from common import ALPHANUMERIC
 from common import Graph
-from common import is_alphanumeric
+from common import GraphError
 
 
 class Algorithms(enum.Enum):
   BFS = 1
   ID = 2
   ASTAR = 3
+  BIBFS = 4
+  BIASTAR = 5
+  IDASTAR = 6
+  ALT = 7
+  CH = 8
+  DIJKSTRA = 9
+  ARASTAR = 10
+  BFSVEC = 11
+
+ALGORITHM_NAMES = ", ".join(algorithm.name for algorithm in Algorithms)
+
+# Size of the chunks in which the graph file is read
+READ_BUFFER_SIZE = 1 << 20
+
+def coordinates(value):
+  """Parse an 'X,Y' pair of co-ordinates for argparse
+
+  Returns:
+    A tuple of two floats.
+  """
+  try:
+    x, y = value.split(",")
+    return float(x), float(y)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"invalid co-ordinates: '{value}', expected X,Y") from None
 
 def create_parser():
   """Creates the argument parses for controlling the program runs
@@ -37,10 +78,40 @@ def create_parser():
   parser.version = "1.0.0"
   parser.add_argument('-v', action='count', help="Enable verbosity for program runs")
   parser.add_argument('-start', action='store', help="Name of the start node")
-  parser.add_argument('-goal', action='store', help="Name of the goal node")
-  parser.add_argument('-alg', action='store', help="One of: BFS, ID, ASTAR")
+  parser.add_argument('-goal', action='store', help="Name of the goal node. A comma separated "
+                                                    "list of goals for DIJKSTRA")
+  parser.add_argument('-start-xy', type=coordinates, action='store',
+                      help="Co-ordinates X,Y to snap to the nearest start node")
+  parser.add_argument('-goal-xy', type=coordinates, action='store',
+                      help="Co-ordinates X,Y to snap to the nearest goal node")
+  parser.add_argument('-alg', action='store', help=f"One of: {ALGORITHM_NAMES}")
   parser.add_argument('-depth', type=int, action='store', help="Initial search depth (ONLY) "
                                                      "for Iterative Deepening (ID)")
+  parser.add_argument('-k', type=int, action='store',
+                      help="Number of shortest loopless paths to list (ONLY) for ASTAR")
+  parser.add_argument('-budget-ms', type=float, action='store',
+                      help="Time budget in milliseconds (ONLY) for ARASTAR "
+                           f"(default: {search.ARA_BUDGET_MS})")
+  parser.add_argument('-growth', type=float, action='store',
+                      help="Minimum relative growth of the bound between iterations (ONLY) "
+                           "for IDASTAR, e.g. 0.1 for a path within 1.1 times the optimal cost "
+                           f"(default: {search.IDA_BOUND_GROWTH:g}, the optimal path)")
+  parser.add_argument('-landmarks', type=int, action='store', default=16,
+                      help="Number of landmarks (ONLY) for ALT (default: 16)")
+  parser.add_argument('-preprocess', action='store_true',
+                      help="Only build and store the index used by -alg ALT or CH")
+  parser.add_argument('-no-snapshot', action='store_true',
+                      help="Always parse the graph file instead of using its binary snapshot")
+  parser.add_argument('-queries', action='store', help="Path to a file with one 'start goal' "
+                                                       "pair per line to answer in a batch")
+  parser.add_argument('-workers', type=int, action='store', default=1,
+                      help="Number of worker processes for -queries (default: 1)")
+  parser.add_argument('-changes', action='store',
+                      help="Path to a file of edge changes ('+ A B' or '- A B' lines, with "
+                           "blank lines between batches) to re-plan the path after (ONLY) "
+                           "for ASTAR")
+  parser.add_argument('-stats', action='store_true',
+                      help="Report the search statistics and phase times as JSON on stderr")
   parser.add_argument('graph_file', action='store', help="Path to the graph input")
   return parser
 
@@ -53,16 +124,65 @@ def validate_args(args):
   Returns:
     a validated instance of `common.Graph`
   """
-  if args.start and args.goal and not args.alg:
-    logging.error("please provide the -alg option (one of BFS, ID, ASTAR)")
+  if args.start and args.start_xy:
+    logging.error("-start and -start-xy can not be combined")
+    sys.exit()
+  if args.goal and args.goal_xy:
+    logging.error("-goal and -goal-xy can not be combined")
+    sys.exit()
+  start = args.start or args.start_xy
+  goal = args.goal or args.goal_xy
+  if start and goal and not args.alg:
+    logging.error(f"please provide the -alg option (one of {ALGORITHM_NAMES})")
     sys.exit()
   valid_algorithms = [algorithm.name for algorithm in Algorithms]
   if args.alg and args.alg not in valid_algorithms:
-    logging.error("-alg option should be one of: BFS, ID, ASTAR")
+    logging.error(f"-alg option should be one of: {ALGORITHM_NAMES}")
+    sys.exit()
+  if args.queries and (start or goal):
+    logging.error("-queries can not be combined with -start and -goal")
+    sys.exit()
+  if args.queries and not args.alg:
+    logging.error(f"please provide the -alg option (one of {ALGORITHM_NAMES})")
+    sys.exit()
+  if args.preprocess and args.alg not in (Algorithms.ALT.name, Algorithms.CH.name):
+    logging.error("-preprocess option can be specified only with -alg ALT or CH")
+    sys.exit()
+  if args.alg == Algorithms.DIJKSTRA.name and not args.queries and start is None:
+    logging.error(f"Please provide a valid -start for {args.alg}")
+    sys.exit()
+  if (args.alg and args.alg != Algorithms.DIJKSTRA.name and not args.queries
+      and not args.preprocess and (start is None or goal is None)):
+    logging.error(f"Please provide a valid -start and -goal for {args.alg}")
+    sys.exit()
+  if args.changes and (args.alg != Algorithms.ASTAR.name or args.queries):
+    logging.error("-changes option can be specified only with -start, -goal and -alg ASTAR")
+    sys.exit()
+  if args.k is not None and (args.alg != Algorithms.ASTAR.name or args.queries
+                             or args.changes):
+    logging.error("-k option can be specified only with -start, -goal and -alg ASTAR")
+    sys.exit()
+  if args.k is not None and args.k < 1:
+    logging.error("-k should be a positive integer")
+    sys.exit()
+  if args.budget_ms is not None and args.alg != Algorithms.ARASTAR.name:
+    logging.error("-budget-ms option can be specified only with -alg ARASTAR")
+    sys.exit()
+  if args.budget_ms is not None and args.budget_ms < 0:
+    logging.error("-budget-ms should not be negative")
+    sys.exit()
+  if args.growth is not None and args.alg != Algorithms.IDASTAR.name:
+    logging.error("-growth option can be specified only with -alg IDASTAR")
+    sys.exit()
+  if args.growth is not None and args.growth < 0:
+    logging.error("-growth should not be negative")
+    sys.exit()
+  if args.landmarks < 1:
+    logging.error("-landmarks should be a positive integer")
+    sys.exit()
+  if args.workers < 1:
+    logging.error("-workers should be a positive integer")
     sys.exit()
-  if args.alg and (args.start is None or args.goal is None):
-      logging.error(f"Please provide a valid -start and -goal for {args.alg}")
-      sys.exit()
   if args.depth is not None and args.alg != Algorithms.ID.name:
     logging.error("-depth option can be specified only for the "
                      "iterative deepening approach. Make sure to set "
@@ -72,16 +192,64 @@ def validate_args(args):
     logging.error("-depth option should be specified for the "
                      "iterative deepening approach.")
     sys.exit()
-  graph = validate_graph_file(args=args)
-  if args.start and args.start not in graph.get_node_names():
+  graph = load_graph(args=args)
+  if args.start_xy or args.goal_xy:
+    snap_coordinates(args=args, graph=graph)
+  if args.start and not graph.has_node(args.start):
     logging.error(f"-start {args.start} should be a valid node in the graph")
     sys.exit()
-  if args.goal and args.goal not in graph.get_node_names():
-    logging.error(f"-goal {args.goal} is not a valid node in the graph")
-    sys.exit()
+  goals = [args.goal]
+  if args.goal and args.alg == Algorithms.DIJKSTRA.name:
+    goals = args.goal.split(",")
+  for goal in goals:
+    if goal and not graph.has_node(goal):
+      logging.error(f"-goal {goal} is not a valid node in the graph")
+      sys.exit()
   return graph
 
 
+def snap_coordinates(args, graph):
+  """Set `args.start`/`args.goal` to the nodes nearest to the
+  `-start-xy`/`-goal-xy` co-ordinates. Two lookups do not pay for
+  building a `spatial.KDTree`, so the co-ordinates are scanned.
+
+  Args:
+    args: Parsed args from `argparse.ArgumentParser`.
+    graph: An instance of `common.Graph`
+  """
+  if len(graph) == 0:
+    logging.error("Unable to snap co-ordinates to a node of an empty graph")
+    sys.exit()
+  if args.start_xy:
+    args.start = graph.names[spatial.nearest_node(graph, *args.start_xy)]
+    logging.debug(f"Snapped -start-xy {args.start_xy} to node {args.start}")
+  if args.goal_xy:
+    args.goal = graph.names[spatial.nearest_node(graph, *args.goal_xy)]
+    logging.debug(f"Snapped -goal-xy {args.goal_xy} to node {args.goal}")
+
+def load_graph(args):
+  """Load the graph from the binary snapshot of the graph file if it
+  is up to date, otherwise parse the graph file and store a snapshot.
+
+  Args:
+    args: Parsed args from `argparse.ArgumentParser`.
+
+  Returns:
+    a validated instance of `common.Graph`
+  """
+  if args.no_snapshot:
+    return validate_graph_file(args=args)
+  with tracing.phase("snapshot"):
+    graph = snapshot.load_snapshot(args.graph_file)
+  if graph is None:
+    graph = validate_graph_file(args=args)
+    try:
+      with tracing.phase("snapshot"):
+        snapshot.save_snapshot(graph, args.graph_file)
+    except OSError:
+      logging.debug(f"Unable to store a snapshot at {snapshot.snapshot_path(args.graph_file)}")
+  return graph
+
 def validate_graph_file(args):
   """Validate the contents of the input graph file.
 
@@ -89,57 +257,77 @@ def validate_graph_file(args):
   checks based on node and edge creation.
 
   Args:
-    graph_file: Path to the input file which describes the graph
-      structure.
+    args: Parsed args from `argparse.ArgumentParser`, with the path
+      to the input file which describes the graph structure.
 
   Returns:
     a validated instance of `common.Graph`
   """
-  graph_file = args.graph_file
-  lines = []
-  with open(graph_file, "r") as gf:
-    lines = gf.readlines()
+  try:
+    return read_graph(graph_file=args.graph_file)
+  except GraphError as e:
+    logging.error(e)
+    sys.exit()
 
-  fmt_lines = []
-  for line in lines:
-    if line.startswith("#"):
-      continue
-    fmt_line = line.replace("\n", "").strip()
-    if fmt_line:
-      fmt_lines.append(fmt_line)
+def read_graph(graph_file):
+  """Parse a graph file in a single streaming pass.
 
-  graph = Graph()
-  node_creators = []
-  edge_creators = []
-  for line in fmt_lines:
-    entities = line.split(" ")
-    if len(entities) == 3:
-      node_name = entities[0]
-      if not is_alphanumeric(node_name):
-        logging.error(f"Invalid node name: {node_name} encountered")
-        sys.exit()
-      node_creators.append(entities)
-    elif len(entities) == 2:
-      node_name1 = entities[0]
-      node_name2 = entities[1]
-      if not is_alphanumeric(node_name1) or not is_alphanumeric(node_name2):
-        logging.error(f"Unable to add an edge from {node_name1} to {node_name2} "
-                       "as the node name(s) are not alphanumeric")
-        sys.exit()
-      edge_creators.append(entities)
-    else:
-      logging.error(f"Invalid line in the graph file. Found: '{line}' which "
-                      "is neither a comment, vertex nor an edge.")
-      sys.exit()
+  The file is read in buffered chunks and every node and edge is added
+  to the graph as soon as its line is read, so no copy of the file is
+  held in memory. An edge may appear before the lines of its nodes.
 
-  for item in node_creators:
-    graph.add_node(name=item[0], x=item[1], y=item[2])
-  for item in edge_creators:
-    graph.add_edge(name1=item[0], name2=item[1])
+  Args:
+    graph_file: Path to the input file which describes the graph
+      structure.
 
-  return graph
+  Returns:
+    a validated instance of `common.Graph`
+
+  Raises:
+    GraphError: for the first invalid line, with its line number.
+  """
+  graph = Graph()
+  # Nodes referred to by an edge before being added, with the line number
+  pending = {}
+  valid_name = ALPHANUMERIC.fullmatch
+  with tracing.phase("parse"), open(graph_file, "r", buffering=READ_BUFFER_SIZE) as gf:
+    for line_number, line in enumerate(gf, start=1):
+      if line.startswith("#"):
+        continue
+      line = line.strip()
+      if not line:
+        continue
+      entities = line.split(" ")
+      if len(entities) == 3:
+        node_name = entities[0]
+        if not valid_name(node_name):
+          raise GraphError(f"Line {line_number}: Invalid node name: {node_name} encountered")
+        try:
+          graph.add_node(name=node_name, x=entities[1], y=entities[2])
+        except GraphError as e:
+          raise GraphError(f"Line {line_number}: {e}") from None
+        pending.pop(node_name, None)
+      elif len(entities) == 2:
+        node_name1 = entities[0]
+        node_name2 = entities[1]
+        if not valid_name(node_name1) or not valid_name(node_name2):
+          raise GraphError(f"Line {line_number}: Unable to add an edge from {node_name1} to "
+                           f"{node_name2} as the node name(s) are not alphanumeric")
+        for node_name in entities:
+          if node_name not in graph.index:
+            pending[node_name] = line_number
+        graph.add_edge(name1=node_name1, name2=node_name2)
+      else:
+        raise GraphError(f"Line {line_number}: Invalid line in the graph file. Found: "
+                         f"'{line}' which is neither a comment, vertex nor an edge.")
 
-def find_path(graph, alg, start, goal, depth=None):
+  for node_name, line_number in pending.items():
+    raise GraphError(f"Line {line_number}: Node: {node_name} is not present in the graph "
+                     "to add an edge")
+  with tracing.phase("build"):
+    return graph.finalize()
+
+def find_path(graph, alg, start, goal, depth=None, index=None, budget_ms=None, growth=None):
   """Find the path from start to goal in the graph using
   algorithm `alg`
 
@@ -149,13 +337,229 @@ def find_path(graph, alg, start, goal, depth=None):
     start: start node for the search
     goal: destination node for the search
     depth: depth value for iterative deepening
+    index: An instance of `landmarks.LandmarkIndex` for ALT or of
+      `contraction.ContractionHierarchy` for CH
+    budget_ms: time budget in milliseconds for ARASTAR
+    growth: minimum relative growth of the bound for IDASTAR
   """
   if alg == Algorithms.BFS.name:
     return search.bfs(graph=graph, start=start, goal=goal)
+  if alg == Algorithms.BFSVEC.name:
+    return search.vectorized_bfs(graph=graph, start=start, goal=goal)
   if alg == Algorithms.ID.name:
     return search.ids(graph=graph, start=start, goal=goal, depth=depth)
   if alg == Algorithms.ASTAR.name:
     return search.astar(graph=graph, start=start, goal=goal)
+  if alg == Algorithms.BIBFS.name:
+    return search.bidirectional_bfs(graph=graph, start=start, goal=goal)
+  if alg == Algorithms.BIASTAR.name:
+    return search.bidirectional_astar(graph=graph, start=start, goal=goal)
+  if alg == Algorithms.IDASTAR.name:
+    return search.idastar(graph=graph, start=start, goal=goal,
+                          growth=search.IDA_BOUND_GROWTH if growth is None else growth)
+  if alg == Algorithms.ALT.name:
+    return search.alt(graph=graph, start=start, goal=goal, index=index)
+  if alg == Algorithms.CH.name:
+    return search.ch(graph=graph, start=start, goal=goal, hierarchy=index)
+  if alg == Algorithms.DIJKSTRA.name:
+    return search.dijkstra(graph=graph, start=start, goal=goal)
+  if alg == Algorithms.ARASTAR.name:
+    return search.arastar(graph=graph, start=start, goal=goal,
+                          budget_ms=search.ARA_BUDGET_MS if budget_ms is None else budget_ms)
+
+def read_queries(queries_file, graph):
+  """Read and validate the start/goal pairs of a queries file.
+
+  Every non-empty line which is not a comment holds the names of the
+  start and goal nodes separated by a space. Either can instead be `X,Y`
+  co-ordinates, which are snapped to the nearest node with one
+  `spatial.KDTree` built for the whole file.
+
+  Args:
+    queries_file: Path to the queries file
+    graph: An instance of `common.Graph`
+
+  Returns:
+    A list of (start, goal) tuples in the order of the file.
+  """
+  queries = []
+  tree = None
+  with open(queries_file, "r") as qf:
+    for line_number, line in enumerate(qf, start=1):
+      line = line.strip()
+      if not line or line.startswith("#"):
+        continue
+      entities = line.split()
+      if len(entities) != 2:
+        logging.error(f"Invalid query on line {line_number} of {queries_file}: '{line}'. "
+                      "Expected 'start goal'.")
+        sys.exit()
+      for idx, name in enumerate(entities):
+        if "," in name:
+          try:
+            point = coordinates(name)
+          except argparse.ArgumentTypeError as error:
+            logging.error(f"Line {line_number} of {queries_file}: {error}")
+            sys.exit()
+          if tree is None:
+            if len(graph) == 0:
+              logging.error("Unable to snap co-ordinates to a node of an empty graph")
+              sys.exit()
+            tree = spatial.KDTree.from_graph(graph)
+          entities[idx] = graph.names[tree.nearest(*point)]
+        elif not graph.has_node(name):
+          logging.error(f"Node: {name} on line {line_number} of {queries_file} "
+                        "is not a valid node in the graph")
+          sys.exit()
+      queries.append((entities[0], entities[1]))
+  return queries
+
+def read_changes(changes_file, graph):
+  """Read and validate the batches of edge changes of a changes file.
+
+  Every non-empty line which is not a comment is `+ A B` to add the edge
+  A -- B or `- A B` to remove it. Blank lines separate the batches.
+
+  Args:
+    changes_file: Path to the changes file
+    graph: An instance of `common.Graph`
+
+  Returns:
+    A list of batches, each a list of (operation, name1, name2) tuples.
+  """
+  batches = [[]]
+  with open(changes_file, "r") as cf:
+    for line_number, line in enumerate(cf, start=1):
+      line = line.strip()
+      if not line:
+        if batches[-1]:
+          batches.append([])
+        continue
+      if line.startswith("#"):
+        continue
+      entities = line.split()
+      if len(entities) != 3 or entities[0] not in ("+", "-"):
+        logging.error(f"Invalid change on line {line_number} of {changes_file}: '{line}'. "
+                      "Expected '+ A B' or '- A B'.")
+        sys.exit()
+      for name in entities[1:]:
+        if not graph.has_node(name):
+          logging.error(f"Node: {name} on line {line_number} of {changes_file} "
+                        "is not a valid node in the graph")
+          sys.exit()
+      batches[-1].append(tuple(entities))
+  return [batch for batch in batches if batch]
+
+def replan(graph, start, goal, batches):
+  """Find the path from start to goal, and repair it after every batch
+  of edge changes with an `incremental.IncrementalPlanner`.
+
+  Args:
+    graph: An instance of `common.Graph`
+    start: start node for the search
+    goal: destination node for the search
+    batches: A list of batches of edge changes (see `read_changes`)
+
+  Yields:
+    The solution before the changes and after every batch.
+  """
+  planner = incremental.IncrementalPlanner(graph=graph, start=start, goal=goal)
+  yield planner.plan()
+  for batch in batches:
+    for operation, name1, name2 in batch:
+      try:
+        if operation == "+":
+          planner.add_edge(name1, name2)
+        else:
+          planner.remove_edge(name1, name2)
+      except GraphError as e:
+        logging.error(e)
+        sys.exit()
+    yield planner.plan()
+
+# The state of a batch worker process, set once by `_init_worker`
+_worker_state = {}
+
+def _init_worker(graph, alg, depth, index, budget_ms, growth, stats):
+  """Initialize a batch worker with the (read-only) graph.
+
+  With the 'fork' start method the graph arrays are inherited by the
+  workers without being copied or pickled.
+  """
+  _worker_state.update(graph=graph, alg=alg, depth=depth, index=index, budget_ms=budget_ms,
+                       growth=growth, tree=None, stats=stats)
+
+def _answer_query(query):
+  """Answer one (start, goal) query in a batch worker
+
+  Returns:
+    The tuple (solution, stats), where stats is the `to_dict()` of the
+    `tracing.SearchStats` of the query, or None if they are not collected.
+  """
+  start, goal = query
+  if not _worker_state["stats"]:
+    return _solve(_worker_state, start, goal), None
+  with tracing.collect_stats() as stats:
+    solution = _solve(_worker_state, start, goal)
+  return solution, stats.to_dict()
+
+def _solve(state, start, goal):
+  """Answer one query of a batch.
+
+  For DIJKSTRA the shortest path tree of the previous query is reused
+  while the queries have the same start.
+  """
+  if state["alg"] == Algorithms.DIJKSTRA.name:
+    if state["tree"] is None or state["tree"].start != start:
+      state["tree"] = search.ShortestPathTree(state["graph"], start)
+    return state["tree"].solution(goal)
+  return find_path(graph=state["graph"], alg=state["alg"], start=start, goal=goal,
+                   depth=state["depth"], index=state["index"], budget_ms=state["budget_ms"],
+                   growth=state["growth"])
+
+def answer_queries(graph, alg, queries, depth=None, index=None, budget_ms=None, growth=None,
+                   workers=1, stats=None):
+  """Answer a batch of queries on the same graph.
+
+  Args:
+    graph: An instance of `common.Graph`
+    alg: One of the `Algorithms`
+    queries: A list of (start, goal) tuples
+    depth: depth value for iterative deepening
+    index: The preprocessed index for ALT or CH (see `find_path`)
+    budget_ms: time budget in milliseconds for ARASTAR
+    growth: minimum relative growth of the bound for IDASTAR
+    workers: The number of worker processes to spread the queries over
+    stats: An instance of `tracing.SearchStats` to accumulate the search
+      statistics of the queries into, or None
+
+  Yields:
+    The solution of every query, in the order of `queries`.
+  """
+  if workers == 1:
+    state = dict(graph=graph, alg=alg, depth=depth, index=index, budget_ms=budget_ms,
+                 growth=growth, tree=None)
+    for start, goal in queries:
+      if stats is None:
+        yield _solve(state, start, goal)
+        continue
+      with tracing.collect_stats(stats):
+        solution = _solve(state, start, goal)
+      yield solution
+    return
+
+  if "fork" in multiprocessing.get_all_start_methods():
+    context = multiprocessing.get_context("fork")
+  else:
+    context = multiprocessing.get_context()
+  chunksize = max(1, len(queries) // (workers * 16))
+  with context.Pool(processes=workers, initializer=_init_worker,
+                    initargs=(graph, alg, depth, index, budget_ms, growth,
+                              stats is not None)) as pool:
+    for solution, query_stats in pool.imap(_answer_query, queries, chunksize=chunksize):
+      if query_stats is not None:
+        stats.add(query_stats)
+      yield solution
 
 def set_logging(v):
   """Create a logger for the program
@@ -164,24 +568,89 @@ def set_logging(v):
     v: The verbosity option with which the program is
       being executed.
   """
-  if args.v:
+  if v:
     logging.basicConfig(level=logging.DEBUG, format='%(message)s')
   else:
     logging.basicConfig(level=logging.ERROR, format='%(message)s')
 
+def report_stats(timer, stats, searches):
+  """Write the statistics of a program run as a JSON object to stderr
+
+  Args:
+    timer: The `tracing.PhaseTimer` of the run
+    stats: The `tracing.SearchStats` of the searches of the run
+    searches: The number of searches answered
+  """
+  report = {"phases": timer.to_dict(), "search": stats.to_dict(), "searches": searches}
+  print(json.dumps(report), file=sys.stderr)
+
 
 if __name__ == "__main__":
 
   path_parser = create_parser()
   args = path_parser.parse_args()
   set_logging(v=args.v)
-  graph = validate_args(args=args)
-  if args.start and args.goal:
-    path = find_path(
-      graph=graph,
-      alg=args.alg,
-      start=args.start,
-      goal=args.goal,
-      depth=args.depth
-    )
-    print(path)
\ No newline at end of file
+  timer = tracing.PhaseTimer()
+  stats = tracing.SearchStats() if args.stats else None
+  searches = 0
+  with contextlib.ExitStack() as profiling:
+    if args.stats:
+      profiling.enter_context(tracing.time_phases(timer))
+    graph = validate_args(args=args)
+    index = None
+    with tracing.phase("preprocess"):
+      if args.alg == Algorithms.ALT.name:
+        index = landmarks.load_or_build_index(graph_file=args.graph_file, graph=graph,
+                                              k=args.landmarks)
+      elif args.alg == Algorithms.CH.name:
+        index = contraction.load_or_build_hierarchy(graph_file=args.graph_file, graph=graph)
+    # Only the searches are counted, not the Dijkstra runs which build
+    # the ALT and CH indices
+    if args.stats:
+      profiling.enter_context(tracing.collect_stats(stats))
+    if args.alg == Algorithms.DIJKSTRA.name and args.start:
+      with tracing.phase("search"):
+        tree = search.ShortestPathTree(graph=graph, start=args.start)
+      searches += 1
+      if args.goal:
+        for goal in args.goal.split(","):
+          print(tree.solution(goal))
+      else:
+        for line in tree.dump():
+          print(line)
+    elif args.k:
+      with tracing.phase("search"):
+        paths = search.k_shortest_paths(graph=graph, start=args.start, goal=args.goal, k=args.k)
+      searches += 1
+      for path in paths:
+        print(path)
+    elif args.changes:
+      batches = read_changes(changes_file=args.changes, graph=graph)
+      with tracing.phase("search"):
+        for path in replan(graph=graph, start=args.start, goal=args.goal, batches=batches):
+          searches += 1
+          print(path, flush=True)
+    elif args.start and args.goal:
+      with tracing.phase("search"):
+        path = find_path(
+          graph=graph,
+          alg=args.alg,
+          start=args.start,
+          goal=args.goal,
+          depth=args.depth,
+          index=index,
+          budget_ms=args.budget_ms,
+          growth=args.growth
+        )
+      searches += 1
+      print(path)
+    elif args.queries:
+      queries = read_queries(queries_file=args.queries, graph=graph)
+      with tracing.phase("search"):
+        for path in answer_queries(graph=graph, alg=args.alg, queries=queries,
+                                   depth=args.depth, index=index, budget_ms=args.budget_ms,
+                                   growth=args.growth, workers=args.workers, stats=stats):
+          searches += 1
+          print(path, flush=True)
+  if args.stats:
+    report_stats(timer=timer, stats=stats, searches=searches)
@@ -10,9 +10,88 @@ find a path from start node to goal in a graph.
 
 from collections import deque
 import heapq
+import itertools
 import logging
+import math
+import time
 
-from common import euclidean_distance
+import numpy as np
+
+import tracing
+
+# Sentinels stored in the parent arrays of the searches
+UNVISITED = -2
+NO_PARENT = -1
+
+# Default minimum relative growth of the bound of `idastar` between
+# iterations: 0 keeps the search optimal
+IDA_BOUND_GROWTH = 0.0
+
+# Default time budget of `arastar` in milliseconds
+ARA_BUDGET_MS = 100
+# Initial inflation of the heuristic of `arastar`, and its decrement
+ARA_INITIAL_EPSILON = 3.0
+ARA_EPSILON_STEP = 0.5
+
+def new_parents(graph):
+  """Create a parent array with one `UNVISITED` entry per node.
+
+  Args:
+    graph: An instance of `common.Graph` class
+
+  Returns:
+    A numpy array of parent node ids indexed by node id.
+  """
+  return np.full(len(graph), UNVISITED, dtype=np.int64)
+
+def rebuild_path(parents, goal):
+  """Rebuild the path ending in `goal` by following the parent pointers
+  back to the node whose parent is `NO_PARENT`.
+
+  Args:
+    parents: A parent array as created by `new_parents`, or a dict
+      of parent ids
+    goal: Id of the last node of the path
+
+  Returns:
+    A list of node ids from the start node to `goal`.
+  """
+  path = [goal]
+  while parents[path[-1]] != NO_PARENT:
+    path.append(int(parents[path[-1]]))
+  path.reverse()
+  return path
+
+def join_paths(forward_parents, backward_parents, node, other):
+  """Join the two halves of a path found by a bidirectional search.
+
+  Args:
+    forward_parents: The parent array of the search from the start node
+    backward_parents: The parent array of the search from the goal node
+    node: Id of the last node of the forward half
+    other: Id of the first node of the backward half. Either equal to
+      `node` or a neighbour of it.
+
+  Returns:
+    A list of node ids from the start node to the goal node.
+  """
+  path = rebuild_path(forward_parents, node)
+  backward_path = rebuild_path(backward_parents, other)
+  backward_path.reverse()
+  if other == node:
+    backward_path = backward_path[1:]
+  return path + backward_path
+
+def format_solution(graph, path):
+  """Format a path of node ids as the program output
+
+  Args:
+    graph: An instance of `common.Graph` class
+    path: A list of node ids, or None if no path was found.
+  """
+  if path is None:
+    return "Solution: Not found"
+  return f'Solution: {"->".join(graph.names[node] for node in path)}'
 
 def bfs(graph, start, goal):
   """Search for a path from start to goal using
@@ -23,28 +102,98 @@ def bfs(graph, start, goal):
     start: Name of the starting node
     goal: Name of the destination node
   """
-  visited = {name: False for name in graph.get_node_names()}
-  queue = deque([])
-  queue.append(start)
-  found = False
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  parents = new_parents(graph)
+  parents[start] = NO_PARENT
+  queue = deque([start])
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(len(queue))
 
   while queue:
-    current_path = queue.popleft()
-    node_name = current_path.split(",")[-1]
-    if node_name == goal:
-      found = True
-      break
-    if not visited[node_name]:
-      logging.debug(f"Expanding: {node_name}")
-      visited[node_name] = True
-    neighbours = graph.g[node_name]
+    node = queue.popleft()
+    if node == goal:
+      return format_solution(graph, rebuild_path(parents, goal))
+    neighbours = graph.neighbours_of(node).tolist()
+    if tracer:
+      tracer.expand(len(neighbours), "Expanding: %s", graph.names[node])
     for neighbour in neighbours:
-      if not visited[neighbour]:
-        queue.append(f'{current_path},{neighbour}')
+      if parents[neighbour] == UNVISITED:
+        parents[neighbour] = node
+        queue.append(neighbour)
+        if tracer:
+          tracer.push(len(queue))
+
+  return format_solution(graph, None)
+
+def vectorized_bfs(graph, start, goal):
+  """Search for a path from start to goal using a level synchronous
+  breadth first search over the CSR arrays.
+
+  A whole frontier is expanded at a time: the neighbours of all its
+  nodes are gathered with one fancy indexing pass, filtered with a
+  visited bitmap, and the first occurrence of every new node (in the
+  order of the frontier and of the neighbours) becomes the next
+  frontier. A node's parent is thus the same node which would have
+  discovered it first in `bfs`, so both searches return the same path.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  parents = new_parents(graph)
+  parents[start] = NO_PARENT
+  visited = np.zeros(len(graph), dtype=bool)
+  visited[start] = True
+  frontier = np.array([start], dtype=np.int64)
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(len(frontier))
 
-  if found:
-    return f'Solution: {current_path.replace(",", "->")}'
-  return "Solution: Not found"
+  while len(frontier) and not visited[goal]:
+    sources, neighbours = _gather_neighbours(graph, frontier)
+    if tracer:
+      tracer.expand(len(neighbours), "Expanding a level of %s nodes", len(frontier),
+                    count=len(frontier))
+    new = ~visited[neighbours]
+    sources, neighbours = sources[new], neighbours[new]
+    # The first occurrence of every newly discovered node
+    _, first = np.unique(neighbours, return_index=True)
+    first.sort()
+    frontier = neighbours[first]
+    parents[frontier] = sources[first]
+    visited[frontier] = True
+    if tracer:
+      tracer.push(len(frontier), count=len(frontier))
+
+  if not visited[goal]:
+    return format_solution(graph, None)
+  return format_solution(graph, rebuild_path(parents, goal))
+
+def _gather_neighbours(graph, frontier):
+  """Gather the neighbours of all the nodes of a frontier at once.
+
+  Returns:
+    The tuple (sources, neighbours) of arrays, with one element per edge
+    leaving the frontier, in the order of the frontier and of the
+    neighbours of each node.
+  """
+  starts = graph.offsets[frontier]
+  counts = graph.offsets[frontier + 1] - starts
+  total = int(counts.sum())
+  # Positions of the edges in `graph.neighbours`: the start of the node's
+  # neighbours plus the rank of the edge among them
+  ends = np.cumsum(counts)
+  positions = np.arange(total, dtype=np.int64) + np.repeat(starts - (ends - counts), counts)
+  return np.repeat(frontier, counts), graph.neighbours[positions]
 
 def ids(graph, start, goal, depth):
   """Search for a path from start to goal using
@@ -57,95 +206,788 @@ def ids(graph, start, goal, depth):
     depth: depth for terminating the depth search
 
   NOTE: The `termination_depth` value used here is the maximum
-    incremental `depth` value.
-  """
-  termination_depth = len(graph.nodes)
-  found = False
-  path = deque([])
-  while not found and depth < termination_depth:
-    logging.debug(f"Iterative deepening with max depth: {depth}")
-    visited = {name: False for name in graph.get_node_names()}
-    found, path = _ids_recursor(
-      graph=graph,
-      start=start,
-      goal=goal,
-      depth=depth,
-      orig_depth=depth,
-      visited=visited
-    )
+    incremental `depth` value. The deepening also stops early once a
+    depth limited search is no longer cut off by its limit.
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  termination_depth = len(graph)
+  while depth < termination_depth:
+    logging.debug("Iterative deepening with max depth: %s", depth)
+    path, next_bound = _bounded_dfs(graph=graph, start=start, goal=goal, bound=depth)
+    if path is not None:
+      return format_solution(graph, path)
+    if next_bound == math.inf:
+      break
     depth += 1
 
-  if found:
-    return f'Solution: {"->".join(path)}'
-  return "Solution: Not found"
+  return format_solution(graph, None)
 
-def _ids_recursor(graph, start, goal, depth, orig_depth, visited):
+def idastar(graph, start, goal, growth=IDA_BOUND_GROWTH):
+  """Search for a path from start to goal using
+  the iterative deepening A* algorithm.
+
+  Each iteration is a depth first search of the paths whose `g+h` is
+  within the current bound, where `h` is the euclidean distance to the
+  goal. With real valued edge costs almost every path has its own `g+h`,
+  so raising the bound to the smallest `g+h` which exceeded it costs
+  one iteration per distinct value. With a positive `growth` the bound
+  is instead raised to at least `1 + growth` times its value. The
+  smallest `g+h` which exceeded the previous bound is a lower bound of
+  the optimal cost, so the path found then costs at most `1 + growth`
+  times the optimal cost.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+    growth: The minimum relative growth of the bound (0 for the
+      optimal path)
+
+  Returns:
+    The solution, followed with a positive `growth` by ` ; bound=<b>`,
+    where the cost of the path is at most `b` times the optimal cost.
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  heuristic = graph.heuristic_to(goal)
+  lower_bound = heuristic[start]
+  bound = lower_bound
+  while bound < math.inf:
+    logging.debug("Iterative deepening A* with bound: %s", bound)
+    path, next_bound = _bounded_dfs(graph=graph, start=start, goal=goal, bound=bound,
+                                    heuristic=heuristic)
+    if path is not None and not growth:
+      return format_solution(graph, path)
+    if path is not None:
+      cost = path_cost(graph, path)
+      ratio = max(1.0, cost / lower_bound) if lower_bound > 0 else 1.0
+      logging.debug("IDA* path with bound=%s ; cost=%s lower bound=%s", bound, cost, lower_bound)
+      # Rounded up, so the reported bound still holds
+      return f"{format_solution(graph, path)} ; bound={math.ceil(ratio * 100 - 1e-9) / 100}"
+    lower_bound = next_bound
+    bound = max(next_bound, round(bound * (1 + growth), 2))
+
+  return format_solution(graph, None)
+
+def _bounded_dfs(graph, start, goal, bound, heuristic=None):
+  """A depth first search, with an explicit stack, of the paths whose
+  `g+h` is within `bound`.
+
+  Without a `heuristic`, every edge costs 1 and `h` is 0, i.e. a depth
+  limited search. A transposition table keeps the cheapest `g` at which
+  every node has been reached in this search, and a node is only
+  expanded again when it is reached more cheaply. Unlike a global
+  visited list, this never prunes a path which fits within the bound.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Id of the starting node
+    goal: Id of the destination node
+    bound: The maximum `g+h` of the paths to search
+    heuristic: An optional array of `h` values indexed by node id
+
+  Returns:
+    The tuple (path, next_bound), where path is a list of node ids or
+    None, and next_bound is the smallest `g+h` which exceeded `bound`
+    (`math.inf` if nothing was cut off).
+  """
+  next_bound = math.inf
   if start == goal:
-    return True, deque([start])
-  if depth <= 0:
-    logging.debug(f"hit depth={orig_depth}: {start}")
-    visited[start] = True
-    return False, deque([])
+    return [start], next_bound
 
-  logging.debug(f"Expanding: {start}")
-  visited[start] = True
-  neighbours = graph.g[start]
-  for neighbour in neighbours:
-    if not visited[neighbour]:
-      found, path = _ids_recursor(
-        graph=graph,
-        start=neighbour,
-        goal=goal,
-        depth=depth-1,
-        orig_depth=orig_depth,
-        visited=visited
-      )
-      if found:
-        path.appendleft(start)
-        return True, path
-  return False, deque([])
+  tracer = tracing.tracer()
+  table = {start: 0}
+  path = [start]
+  costs = [0]
+  stack = [_successors(graph, start, heuristic is not None)]
+  if tracer:
+    tracer.expand(len(graph.neighbours_of(start)), "Expanding: %s", graph.names[start])
+    tracer.push(len(stack))
+  while stack:
+    successor = next(stack[-1], None)
+    if successor is None:
+      stack.pop()
+      path.pop()
+      costs.pop()
+      continue
+    neighbour, weight = successor
+    g = round(costs[-1] + weight, 2)
+    total = g if heuristic is None else round(g + heuristic[neighbour], 2)
+    if total > bound:
+      if tracer:
+        tracer.log("hit bound=%s: %s", bound, graph.names[neighbour])
+      next_bound = min(next_bound, total)
+      continue
+    if neighbour == goal:
+      path.append(goal)
+      return path, next_bound
+    if g >= table.get(neighbour, math.inf):
+      continue
+    table[neighbour] = g
+    path.append(neighbour)
+    costs.append(g)
+    stack.append(_successors(graph, neighbour, heuristic is not None))
+    if tracer:
+      tracer.expand(len(graph.neighbours_of(neighbour)), "Expanding: %s",
+                    graph.names[neighbour])
+      tracer.push(len(stack))
 
+  return None, next_bound
+
+def _successors(graph, node, weighted):
+  """An iterator over the (neighbour, edge cost) pairs of a node. The
+  edge cost is 1 for unweighted searches.
+  """
+  neighbours, weights = graph.edges_of(node)
+  if weighted:
+    return zip(neighbours.tolist(), weights.tolist())
+  return zip(neighbours.tolist(), itertools.repeat(1))
 
 def astar(graph, start, goal):
   """Search for a path from start to goal using
-  the iterative deepening algorithm.
+  the A* algorithm.
+
+  The edge weights are precomputed by `common.Graph.finalize` and the
+  heuristic to the goal is computed for all the nodes at once. A node is
+  expanded at most once (closed set) and heap entries which are worse
+  than the best known cost of their node are skipped when popped.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  return format_solution(graph, _astar(graph, start, goal, graph.heuristic_to(goal)))
+
+def alt(graph, start, goal, index):
+  """Search for a path from start to goal using
+  A* with the landmark (ALT) heuristic.
 
   Args:
     graph: An instance of `common.Graph` class
     start: Name of the starting node
     goal: Name of the destination node
-    depth: Initial depth for terminating the depth search
+    index: An instance of `landmarks.LandmarkIndex` built for `graph`
   """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  return format_solution(graph, _astar(graph, start, goal, index.heuristic_to(graph, goal)))
+
+def _astar(graph, start, goal, heuristic):
+  """The A* search engine shared by `astar` and `alt`.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Id of the starting node
+    goal: Id of the destination node
+    heuristic: Admissible `h` values indexed by node id, an array or a
+      `landmarks.LandmarkHeuristic`. A node with an infinite `h` can not
+      reach the goal.
+
+  Returns:
+    A list of node ids from start to goal, or None if no path exists.
+  """
+  if heuristic[start] == math.inf:
+    return None
+  parents = new_parents(graph)
+  parents[start] = NO_PARENT
+  best_g = np.full(len(graph), np.inf)
+  best_g[start] = 0
+  closed = np.zeros(len(graph), dtype=bool)
   p_queue = []
-  # Each element represents the (g+h, g, h, path) tuple
-  heapq.heappush(p_queue, (0, 0, 0, start))
-  found = False
+  # Each element represents the (g+h, g, h, node) tuple
+  heapq.heappush(p_queue, (heuristic[start], 0, heuristic[start], start))
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(len(p_queue))
 
   while p_queue:
-    cost, g, _, current_path = heapq.heappop(p_queue)
-    logging.debug(f'Adding {current_path.replace(",","->")}')
-    current_node_name = current_path.split(",")[-1]
-    if current_node_name == goal:
-      found = True
-      break
+    cost, g, _, current_node = heapq.heappop(p_queue)
+    if closed[current_node] or g > best_g[current_node]:
+      continue
+    closed[current_node] = True
+    if current_node == goal:
+      if tracer:
+        tracer.log("Adding %s ; g=%s total=%s", graph.names[current_node], g, cost)
+      return rebuild_path(parents, goal)
 
-    neighbours = graph.g[current_node_name]
-    for neighbour in neighbours:
-      # Skip the neighbour which is already in the current path
-      if neighbour in current_path:
+    neighbours, weights = graph.edges_of(current_node)
+    if tracer:
+      tracer.expand(len(neighbours), "Adding %s ; g=%s total=%s",
+                    graph.names[current_node], g, cost)
+    for neighbour_node, weight in zip(neighbours.tolist(), weights.tolist()):
+      if closed[neighbour_node]:
+        continue
+      traversal_cost = round(g + weight, 2)
+      if traversal_cost >= best_g[neighbour_node]:
         continue
-      path = "{},{}".format(current_path, neighbour)
-      current_node = graph.nodes[current_node_name]
-      neighbour_node = graph.nodes[neighbour]
-      goal_node = graph.nodes[goal]
-      traversal_cost = round(g + euclidean_distance(current_node, neighbour_node), 2)
-      heuristic_cost = euclidean_distance(neighbour_node, goal_node)
+      heuristic_cost = heuristic[neighbour_node]
+      if heuristic_cost == math.inf:
+        continue
+      best_g[neighbour_node] = traversal_cost
+      parents[neighbour_node] = current_node
       total_cost = round(traversal_cost + heuristic_cost, 2)
-      logging.debug(
-        f'{path.replace(",","->")} ; g={traversal_cost} h={heuristic_cost} total={total_cost}'
-      )
-      heapq.heappush(p_queue, (total_cost, traversal_cost, heuristic_cost, path))
-
-  if found:
-    return f'Solution: {current_path.replace(",", "->")}'
-  return "Solution: Not found"
\ No newline at end of file
+      heapq.heappush(p_queue, (total_cost, traversal_cost, heuristic_cost, neighbour_node))
+      if tracer:
+        tracer.push(len(p_queue), "%s->%s ; g=%s h=%s total=%s",
+                    graph.names[current_node], graph.names[neighbour_node],
+                    traversal_cost, heuristic_cost, total_cost)
+
+  return None
+
+def arastar(graph, start, goal, budget_ms=ARA_BUDGET_MS, epsilon=ARA_INITIAL_EPSILON):
+  """Search for a path from start to goal using
+  the anytime repairing A* (ARA*) algorithm.
+
+  A weighted A* search with `f = g + epsilon * h` quickly finds a path
+  which costs at most `epsilon` times the optimal cost. While time
+  remains, `epsilon` is decreased by `ARA_EPSILON_STEP` and the search is
+  repaired, reusing its `g` values: only the nodes whose `g` improved
+  since their expansion (the inconsistent nodes) are expanded again.
+  The first path is always completed, even if it takes longer than the
+  budget.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+    budget_ms: The time budget of the search in milliseconds
+    epsilon: The initial inflation of the heuristic (at least 1)
+
+  Returns:
+    The solution followed by ` ; bound=<b>`, where the cost of the path
+    is at most `b` times the optimal cost.
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  deadline = time.perf_counter() + budget_ms / 1000
+  heuristic = graph.heuristic_to(goal).tolist()
+  g = [math.inf] * len(graph)
+  g[start] = 0
+  parents = new_parents(graph)
+  parents[start] = NO_PARENT
+  # The open list holds (f, node) entries. An entry is stale once its node
+  # is no longer open or has a smaller f, and is skipped when popped.
+  opened = {start}
+  p_queue = [(round(epsilon * heuristic[start], 2), start)]
+  inconsistent = set()
+  closed = set()
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(len(p_queue))
+
+  def f(node):
+    return round(g[node] + epsilon * heuristic[node], 2)
+
+  def improve_path(must_finish):
+    """Expand the open nodes until no open node has a smaller f than
+    the goal. Returns False if the deadline passed first."""
+    while p_queue and g[goal] > p_queue[0][0]:
+      if not must_finish and time.perf_counter() > deadline:
+        return False
+      cost, node = heapq.heappop(p_queue)
+      if node not in opened or cost != f(node):
+        continue
+      opened.discard(node)
+      closed.add(node)
+      neighbours, weights = graph.edges_of(node)
+      if tracer:
+        tracer.expand(len(neighbours), "Expanding %s ; g=%s f=%s epsilon=%s",
+                      graph.names[node], g[node], cost, epsilon)
+      for neighbour, weight in zip(neighbours.tolist(), weights.tolist()):
+        traversal_cost = round(g[node] + weight, 2)
+        if traversal_cost >= g[neighbour]:
+          continue
+        g[neighbour] = traversal_cost
+        parents[neighbour] = node
+        if neighbour in closed:
+          inconsistent.add(neighbour)
+        else:
+          opened.add(neighbour)
+          heapq.heappush(p_queue, (f(neighbour), neighbour))
+          if tracer:
+            tracer.push(len(p_queue))
+    return True
+
+  def suboptimality_bound():
+    """`g(goal)` over the smallest `g+h` of the open and inconsistent
+    nodes, a lower bound of the optimal cost"""
+    lower_bound = min((round(g[node] + heuristic[node], 2)
+                       for node in itertools.chain(opened, inconsistent)), default=g[goal])
+    if g[goal] == 0:
+      return 1.0
+    if lower_bound == 0:
+      return epsilon
+    return min(epsilon, max(1.0, g[goal] / lower_bound))
+
+  improve_path(must_finish=True)
+  path = rebuild_path(parents, goal)
+  bound = suboptimality_bound()
+  logging.debug("ARA* path with epsilon=%s ; cost=%s bound=%s", epsilon, g[goal], bound)
+  while bound > 1 and time.perf_counter() < deadline:
+    epsilon = max(1.0, epsilon - ARA_EPSILON_STEP)
+    opened |= inconsistent
+    inconsistent.clear()
+    closed.clear()
+    p_queue[:] = [(f(node), node) for node in opened]
+    heapq.heapify(p_queue)
+    if not improve_path(must_finish=False):
+      break
+    path = rebuild_path(parents, goal)
+    bound = suboptimality_bound()
+    logging.debug("ARA* path with epsilon=%s ; cost=%s bound=%s", epsilon, g[goal], bound)
+
+  # Rounded up, so the reported bound still holds
+  return f"{format_solution(graph, path)} ; bound={math.ceil(bound * 100 - 1e-9) / 100}"
+
+def shortest_path_tree(graph, source):
+  """Compute the shortest path distances and parents from `source` to
+  every node using Dijkstra's algorithm.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    source: Id of the source node
+
+  Returns:
+    The tuple (distances, parents) of arrays indexed by node id. The
+    distance of an unreachable node is `np.inf` and its parent is
+    `UNVISITED`.
+  """
+  distances = np.full(len(graph), np.inf)
+  distances[source] = 0
+  parents = new_parents(graph)
+  parents[source] = NO_PARENT
+  closed = np.zeros(len(graph), dtype=bool)
+  p_queue = [(0, source)]
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(len(p_queue))
+
+  while p_queue:
+    distance, node = heapq.heappop(p_queue)
+    if closed[node]:
+      continue
+    closed[node] = True
+    neighbours, weights = graph.edges_of(node)
+    if tracer:
+      tracer.expand(len(neighbours), "Settling %s ; distance=%s", graph.names[node], distance)
+    for neighbour, weight in zip(neighbours.tolist(), weights.tolist()):
+      new_distance = round(distance + weight, 2)
+      if new_distance < distances[neighbour]:
+        distances[neighbour] = new_distance
+        parents[neighbour] = node
+        heapq.heappush(p_queue, (new_distance, neighbour))
+        if tracer:
+          tracer.push(len(p_queue))
+
+  return distances, parents
+
+class ShortestPathTree():
+  """A class to hold the shortest path tree from a start node to every
+  node of a graph, to answer any number of goals with one search.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+  """
+  def __init__(self, graph, start) -> None:
+    self.graph = graph
+    self.start = start
+    self.distances, self.parents = shortest_path_tree(graph, graph.index[start])
+
+  def solution(self, goal):
+    """Return the solution for the path from the start to `goal`
+
+    Args:
+      goal: Name of the destination node
+    """
+    goal = self.graph.index[goal]
+    if self.parents[goal] == UNVISITED:
+      return format_solution(self.graph, None)
+    return format_solution(self.graph, rebuild_path(self.parents, goal))
+
+  def dump(self):
+    """Yield one 'node distance parent' line for every node reachable
+    from the start, in the order of their distance.
+    """
+    names = self.graph.names
+    reachable = np.flatnonzero(self.parents != UNVISITED)
+    order = reachable[np.argsort(self.distances[reachable], kind="stable")]
+    for node in order.tolist():
+      parent = int(self.parents[node])
+      parent_name = "-" if parent == NO_PARENT else names[parent]
+      yield f"{names[node]} {self.distances[node]} {parent_name}"
+
+def dijkstra(graph, start, goal):
+  """Search for a path from start to goal using
+  Dijkstra's algorithm.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+  """
+  if not graph.connected(graph.index[start], graph.index[goal]):
+    return format_solution(graph, None)
+  return ShortestPathTree(graph, start).solution(goal)
+
+def bidirectional_bfs(graph, start, goal):
+  """Search for a path from start to goal using a breadth first
+  search from both ends.
+
+  The smaller of the two frontiers is expanded one whole level at a
+  time. Once an edge joins the two searches, the level is finished and
+  the shortest of the joined paths is returned, which has the same
+  number of hops as the path found by `bfs`.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  if start == goal:
+    return format_solution(graph, [start])
+  parents = (new_parents(graph), new_parents(graph))
+  depths = (np.full(len(graph), -1, dtype=np.int64),
+            np.full(len(graph), -1, dtype=np.int64))
+  frontiers = ([start], [goal])
+  for side, node in enumerate((start, goal)):
+    parents[side][node] = NO_PARENT
+    depths[side][node] = 0
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(1)
+    tracer.push(2)
+
+  while frontiers[0] and frontiers[1]:
+    side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+    own_parents, other_parents = parents[side], parents[1 - side]
+    own_depths, other_depths = depths[side], depths[1 - side]
+    best = None
+    next_frontier = []
+    for node in frontiers[side]:
+      neighbours = graph.neighbours_of(node).tolist()
+      if tracer:
+        tracer.expand(len(neighbours), "Expanding: %s", graph.names[node])
+      for neighbour in neighbours:
+        if other_depths[neighbour] >= 0:
+          hops = own_depths[node] + 1 + other_depths[neighbour]
+          if best is None or hops < best[0]:
+            best = (hops, node, neighbour)
+        if own_parents[neighbour] == UNVISITED:
+          own_parents[neighbour] = node
+          own_depths[neighbour] = own_depths[node] + 1
+          next_frontier.append(neighbour)
+          if tracer:
+            tracer.push(len(next_frontier) + len(frontiers[1 - side]))
+    if best is not None:
+      _, node, neighbour = best
+      if side == 0:
+        path = join_paths(parents[0], parents[1], node, neighbour)
+      else:
+        path = join_paths(parents[0], parents[1], neighbour, node)
+      return format_solution(graph, path)
+    frontiers = ((next_frontier, frontiers[1]) if side == 0
+                 else (frontiers[0], next_frontier))
+
+  return format_solution(graph, None)
+
+def bidirectional_astar(graph, start, goal):
+  """Search for a path from start to goal using an A* search from
+  both ends.
+
+  Both searches share the balanced potential of Ikeda et al: the forward
+  search orders its nodes by `g + p(v)` with `p(v) = (h_goal(v) -
+  h_start(v)) / 2`, and the backward search by `g - p(v)`, where `h_goal`
+  and `h_start` are the euclidean distances to the goal and to the
+  start. The two searches then run on the same graph of reduced costs,
+  so the frontiers meet in the middle instead of each search crossing
+  most of the way. The side with the smaller open list is expanded next,
+  and `mu` tracks the cost of the best path joining the two searches.
+  The search stops as soon as the smallest keys of the two open lists
+  add up to no less than `mu` (the potentials of the start and the goal
+  cancel out), since no unexplored path can then be cheaper.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  if start == goal:
+    return format_solution(graph, [start])
+  to_goal, to_start = graph.heuristic_to(goal), graph.heuristic_to(start)
+  potentials = (((to_goal - to_start) / 2).tolist(), ((to_start - to_goal) / 2).tolist())
+  parents = (new_parents(graph), new_parents(graph))
+  best_g = (np.full(len(graph), np.inf), np.full(len(graph), np.inf))
+  closed = (np.zeros(len(graph), dtype=bool), np.zeros(len(graph), dtype=bool))
+  p_queues = ([], [])
+  for side, node in enumerate((start, goal)):
+    parents[side][node] = NO_PARENT
+    best_g[side][node] = 0
+    heapq.heappush(p_queues[side], (potentials[side][node], 0, node))
+  mu = math.inf
+  meeting = None
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(1)
+    tracer.push(2)
+
+  while p_queues[0] and p_queues[1]:
+    if p_queues[0][0][0] + p_queues[1][0][0] >= mu:
+      break
+    side = 0 if len(p_queues[0]) <= len(p_queues[1]) else 1
+    own_g, other_g = best_g[side], best_g[1 - side]
+    _, g, current_node = heapq.heappop(p_queues[side])
+    if closed[side][current_node] or g > own_g[current_node]:
+      continue
+    closed[side][current_node] = True
+
+    neighbours, weights = graph.edges_of(current_node)
+    if tracer:
+      tracer.expand(len(neighbours), "Adding %s ; g=%s", graph.names[current_node], g)
+    for neighbour_node, weight in zip(neighbours.tolist(), weights.tolist()):
+      traversal_cost = round(g + weight, 2)
+      if other_g[neighbour_node] < math.inf:
+        joined_cost = round(traversal_cost + other_g[neighbour_node], 2)
+        if joined_cost < mu:
+          mu = joined_cost
+          meeting = ((current_node, neighbour_node) if side == 0
+                     else (neighbour_node, current_node))
+      if closed[side][neighbour_node] or traversal_cost >= own_g[neighbour_node]:
+        continue
+      own_g[neighbour_node] = traversal_cost
+      parents[side][neighbour_node] = current_node
+      # Not rounded: the potentials are halves of rounded distances
+      key = traversal_cost + potentials[side][neighbour_node]
+      heapq.heappush(p_queues[side], (key, traversal_cost, neighbour_node))
+      if tracer:
+        tracer.push(len(p_queues[0]) + len(p_queues[1]))
+
+  if meeting is None:
+    return format_solution(graph, None)
+  return format_solution(graph, join_paths(parents[0], parents[1], *meeting))
+
+def ch(graph, start, goal, hierarchy):
+  """Search for a path from start to goal using
+  a contraction hierarchy.
+
+  A Dijkstra search over the upward edges runs from both the start and
+  the goal, alternating between the two. A direction stops once its
+  smallest distance is no smaller than the best meeting cost `mu`, and
+  the shortcuts of the best path are then unpacked.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+    hierarchy: An instance of `contraction.ContractionHierarchy` built
+      for `graph`
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return format_solution(graph, None)
+  distances = ({start: 0}, {goal: 0})
+  parents = ({start: NO_PARENT}, {goal: NO_PARENT})
+  settled = (set(), set())
+  p_queues = ([(0, start)], [(0, goal)])
+  mu = math.inf
+  meeting = None
+  tracer = tracing.tracer()
+  if tracer:
+    tracer.push(1)
+    tracer.push(2)
+
+  side = 1
+  while p_queues[0] or p_queues[1]:
+    if p_queues[1 - side]:
+      side = 1 - side
+    _, node = heapq.heappop(p_queues[side])
+    if node in settled[side]:
+      continue
+    settled[side].add(node)
+    distance = distances[side][node]
+    if distance >= mu:
+      p_queues[side].clear()
+      continue
+    if node in distances[1 - side]:
+      joined_cost = round(distance + distances[1 - side][node], 2)
+      if joined_cost < mu:
+        mu = joined_cost
+        meeting = node
+    neighbours, weights = hierarchy.upward_edges(node)
+    if tracer:
+      tracer.expand(len(neighbours), "Settling %s ; distance=%s", graph.names[node], distance)
+    for neighbour, weight in zip(neighbours.tolist(), weights.tolist()):
+      new_distance = round(distance + weight, 2)
+      if new_distance < distances[side].get(neighbour, math.inf):
+        distances[side][neighbour] = new_distance
+        parents[side][neighbour] = node
+        heapq.heappush(p_queues[side], (new_distance, neighbour))
+        if tracer:
+          tracer.push(len(p_queues[0]) + len(p_queues[1]))
+
+  if meeting is None:
+    return format_solution(graph, None)
+  logging.debug("Upward searches met at %s ; cost=%s", graph.names[meeting], mu)
+  return format_solution(graph, hierarchy.unpack(join_paths(parents[0], parents[1],
+                                                            meeting, meeting)))
+
+def k_shortest_paths(graph, start, goal, k):
+  """Search for the `k` shortest loopless paths from start to goal
+  using Yen's algorithm.
+
+  Every next path deviates from one of the paths found so far at a spur
+  node: the root of the path up to the spur node is kept, and the spur
+  path from the spur node to the goal avoids the nodes of the root and
+  the edges already taken from the same root. All the spur searches are
+  A* searches guided by one shortest path tree grown from the goal,
+  whose distances remain admissible when nodes and edges are removed.
+  Whenever the tree path from the best first step of a spur node avoids
+  the removed nodes, it is the spur path and no search is needed.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    start: Name of the starting node
+    goal: Name of the destination node
+    k: The number of paths
+
+  Returns:
+    A list of at most `k` solutions with their costs, from the cheapest.
+  """
+  start = graph.index[start]
+  goal = graph.index[goal]
+  if not graph.connected(start, goal):
+    return [format_solution(graph, None)]
+  to_goal, next_hops = shortest_path_tree(graph, goal)
+  heuristic = to_goal.tolist()
+  next_hops = next_hops.tolist()
+  found = [_spur_path(graph, start, goal, heuristic, next_hops, set(), set())]
+  candidates = []
+  seen = {tuple(found[0])}
+
+  while len(found) < k:
+    previous = found[-1]
+    # Cost of the root of `previous` up to every node
+    root_costs = [0]
+    for node1, node2 in zip(previous, previous[1:]):
+      root_costs.append(round(root_costs[-1] + graph.distance(node1, node2), 2))
+    for i in range(len(previous) - 1):
+      spur, root = previous[i], previous[:i + 1]
+      removed_edges = {(path[i], path[i + 1]) for path in found
+                       if len(path) > i + 1 and path[:i + 1] == root}
+      spur_path = _spur_path(graph, spur, goal, heuristic, next_hops, set(root[:-1]),
+                             removed_edges)
+      if spur_path is None:
+        continue
+      path = root[:-1] + spur_path
+      if tuple(path) not in seen:
+        seen.add(tuple(path))
+        heapq.heappush(candidates, (path_cost(graph, spur_path, root_costs[i]), path))
+    if not candidates:
+      break
+    found.append(heapq.heappop(candidates)[1])
+
+  return [f"{format_solution(graph, path)} ; cost={path_cost(graph, path)}" for path in found]
+
+def _spur_path(graph, source, goal, heuristic, next_hops, removed_nodes, removed_edges):
+  """The shortest path from source to goal which avoids some nodes and
+  (directed) edges.
+
+  Every allowed first step `v` costs at least `c(source, v) + d(v)`, where
+  `d` is the distance to the goal in the shortest path tree. If the tree
+  path from the cheapest first step avoids the removed nodes, it reaches
+  that bound and is returned directly. Otherwise an A* search is run.
+
+  Args:
+    graph: An instance of `common.Graph` class
+    source: Id of the first node of the path
+    goal: Id of the destination node
+    heuristic: A list of the tree distances to the goal indexed by id
+    next_hops: A list of the tree parents (towards the goal) indexed by id
+    removed_nodes: A set of node ids to avoid
+    removed_edges: A set of (node1, node2) edges to avoid
+
+  Returns:
+    A list of node ids from source to goal, or None if no path exists.
+  """
+  best, best_cost = None, math.inf
+  neighbours, weights = graph.edges_of(source)
+  for neighbour, weight in zip(neighbours.tolist(), weights.tolist()):
+    if neighbour in removed_nodes or (source, neighbour) in removed_edges:
+      continue
+    if weight + heuristic[neighbour] < best_cost:
+      best, best_cost = neighbour, weight + heuristic[neighbour]
+  if best is None or best_cost == math.inf:
+    return None
+  path = [source, best]
+  while path[-1] != goal:
+    path.append(next_hops[path[-1]])
+    if path[-1] in removed_nodes or path[-1] == source:
+      return _spur_search(graph, source, goal, heuristic, removed_nodes, removed_edges)
+  return path
+
+def _spur_search(graph, source, goal, heuristic, removed_nodes, removed_edges):
+  """An A* search which avoids some nodes and (directed) edges, with
+  dict based state since it usually expands only a few nodes.
+
+  Returns:
+    A list of node ids from source to goal, or None if no path exists.
+  """
+  best_g = {source: 0}
+  parents = {source: NO_PARENT}
+  closed = set()
+  p_queue = [(heuristic[source], 0, source)]
+  tracer = tracing.tracer()
+  while p_queue:
+    _, g, node = heapq.heappop(p_queue)
+    if node in closed or g > best_g[node]:
+      continue
+    if node == goal:
+      return rebuild_path(parents, goal)
+    closed.add(node)
+    neighbours, weights = graph.edges_of(node)
+    if tracer:
+      tracer.expand(len(neighbours), "Spur search expanding %s ; g=%s", graph.names[node], g)
+    for neighbour, weight in zip(neighbours.tolist(), weights.tolist()):
+      if (neighbour in closed or neighbour in removed_nodes
+          or (node, neighbour) in removed_edges or heuristic[neighbour] == math.inf):
+        continue
+      traversal_cost = round(g + weight, 2)
+      if traversal_cost >= best_g.get(neighbour, math.inf):
+        continue
+      best_g[neighbour] = traversal_cost
+      parents[neighbour] = node
+      heapq.heappush(p_queue, (round(traversal_cost + heuristic[neighbour], 2),
+                               traversal_cost, neighbour))
+      if tracer:
+        tracer.push(len(p_queue))
+  return None
+
+def path_cost(graph, path, cost=0):
+  """The cost of a path of node ids, summed (and rounded) edge by edge
+  from its first node as in the searches, starting from `cost`"""
+  for node1, node2 in zip(path, path[1:]):
+    cost = round(cost + graph.distance(node1, node2), 2)
+  return cost
@@ -0,0 +1,283 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module provides a resident path query server, which loads
+a graph once and answers queries until it is stopped.
+
+The server listens on a Unix socket or on a local TCP port and serves
+every connection in its own thread. A client sends one query per line:
+
+  start,goal,alg[,depth]
+
+and receives one line for every query: the `Solution: ...` line of
+`path.py`, or `Error: ...` for an invalid query. The line `STATS`
+returns the counters of the server as JSON. The preprocessed indices of
+ALT and CH are loaded (or built) on their first query, and the most
+recent solutions are kept in an LRU cache.
+"""
+import argparse
+import collections
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+
+import contraction
+import landmarks
+import path
+
+# Number of solutions kept by the cache, by default
+CACHE_SIZE = 4096
+
+class LRUCache():
+  """A thread safe cache of the most recently used solutions.
+
+  Args:
+    capacity: The maximum number of solutions kept
+  """
+  def __init__(self, capacity) -> None:
+    self.capacity = capacity
+    self.hits = 0
+    self.misses = 0
+    self._entries = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def get(self, key):
+    """Return the cached value of `key` (marking it as the most recently
+    used), or None if it is not cached.
+    """
+    with self._lock:
+      value = self._entries.get(key)
+      if value is None:
+        self.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return value
+
+  def put(self, key, value):
+    """Cache the value of `key`, evicting the least recently used
+    value if the cache is full.
+    """
+    if self.capacity < 1:
+      return
+    with self._lock:
+      self._entries[key] = value
+      self._entries.move_to_end(key)
+      if len(self._entries) > self.capacity:
+        self._entries.popitem(last=False)
+
+class PathService():
+  """A class to answer the path queries of a server on a loaded graph.
+
+  Args:
+    graph: An instance of `common.Graph`
+    graph_file: Path to the graph input, next to which the indices of
+      ALT and CH are stored
+    cache_size: The number of solutions kept by the cache
+    num_landmarks: The number of landmarks for ALT
+  """
+  def __init__(self, graph, graph_file, cache_size=CACHE_SIZE, num_landmarks=16) -> None:
+    self.graph = graph
+    self.graph_file = graph_file
+    self.num_landmarks = num_landmarks
+    self.cache = LRUCache(cache_size)
+    self.requests = 0
+    self._indices = {}
+    self._lock = threading.Lock()
+    self._requests_lock = threading.Lock()
+
+  def index_for(self, alg):
+    """Return the preprocessed index of an algorithm, loading or
+    building it on its first use.
+    """
+    if alg not in (path.Algorithms.ALT.name, path.Algorithms.CH.name):
+      return None
+    with self._lock:
+      if alg not in self._indices:
+        if alg == path.Algorithms.ALT.name:
+          self._indices[alg] = landmarks.load_or_build_index(
+            graph_file=self.graph_file, graph=self.graph, k=self.num_landmarks)
+        else:
+          self._indices[alg] = contraction.load_or_build_hierarchy(
+            graph_file=self.graph_file, graph=self.graph)
+      return self._indices[alg]
+
+  def stats(self):
+    """The counters of the service"""
+    return {"requests": self.requests, "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses, "cache_size": len(self.cache)}
+
+  def answer(self, request):
+    """Answer one request line.
+
+    Args:
+      request: A `start,goal,alg[,depth]` query or `STATS`
+
+    Returns:
+      The response line, without a newline.
+    """
+    with self._requests_lock:
+      self.requests += 1
+    request = request.strip()
+    if request == "STATS":
+      return json.dumps(self.stats())
+    fields = request.split(",")
+    if len(fields) not in (3, 4):
+      return f"Error: invalid query '{request}', expected start,goal,alg[,depth]"
+    start, goal, alg = fields[:3]
+    depth = None
+    if alg not in path.ALGORITHM_NAMES.split(", "):
+      return f"Error: alg should be one of: {path.ALGORITHM_NAMES}"
+    if len(fields) == 4 and alg != path.Algorithms.ID.name:
+      return "Error: depth can be specified only with alg ID"
+    if alg == path.Algorithms.ID.name:
+      try:
+        depth = int(fields[3]) if len(fields) == 4 else 0
+      except ValueError:
+        return f"Error: invalid depth '{fields[3]}'"
+    for name in (start, goal):
+      if not self.graph.has_node(name):
+        return f"Error: {name} is not a valid node in the graph"
+
+    # The paths of ARASTAR depend on the time left within its budget, so
+    # they are not cached
+    cacheable = alg != path.Algorithms.ARASTAR.name
+    key = (start, goal, alg, depth)
+    solution = self.cache.get(key) if cacheable else None
+    if solution is None:
+      solution = path.find_path(graph=self.graph, alg=alg, start=start, goal=goal,
+                                depth=depth, index=self.index_for(alg))
+      if cacheable:
+        self.cache.put(key, solution)
+    return solution
+
+class QueryHandler(socketserver.StreamRequestHandler):
+  """Answer the queries of a connection, one line at a time"""
+  def handle(self):
+    for line in self.rfile:
+      response = self.server.service.answer(line.decode("utf-8", errors="replace"))
+      self.wfile.write(f"{response}\n".encode("utf-8"))
+      self.wfile.flush()
+
+class UnixQueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  daemon_threads = True
+
+class TCPQueryServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+  daemon_threads = True
+  allow_reuse_address = True
+
+def create_server(service, socket_path=None, host="127.0.0.1", port=0):
+  """Create a threaded query server for a `PathService`.
+
+  Args:
+    service: An instance of `PathService`
+    socket_path: Path of the Unix socket to listen on, or None to
+      listen on a TCP port
+    host: The host of the TCP port
+    port: The TCP port (0 for any free port)
+
+  Returns:
+    An instance of `socketserver.BaseServer`.
+
+  Raises:
+    FileExistsError: if `socket_path` exists and is not a socket. A
+      stale socket left by an earlier server is removed.
+  """
+  if socket_path is not None:
+    if os.path.lexists(socket_path):
+      if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+      os.remove(socket_path)
+    server = UnixQueryServer(socket_path, QueryHandler)
+  else:
+    server = TCPQueryServer((host, port), QueryHandler)
+  server.service = service
+  return server
+
+def query(address, start, goal, alg, depth=None):
+  """Send one query to a running server.
+
+  Args:
+    address: Path of the Unix socket, or a (host, port) tuple
+    start: Name of the start node
+    goal: Name of the goal node
+    alg: One of the `path.Algorithms`
+    depth: depth value for iterative deepening
+
+  Returns:
+    The response line of the server.
+  """
+  family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+  request = f"{start},{goal},{alg}" + (f",{depth}" if depth is not None else "")
+  with socket.socket(family, socket.SOCK_STREAM) as client:
+    client.connect(address)
+    client.sendall(f"{request}\n".encode("utf-8"))
+    with client.makefile("r", encoding="utf-8") as responses:
+      return responses.readline().rstrip("\n")
+
+def create_parser():
+  """Creates the argument parses for controlling the program runs
+
+  Returns: An instance of `argparse.ArgumentParser`.
+  """
+  parser = argparse.ArgumentParser(
+    description="Serve path queries on a graph kept in memory"
+  )
+  parser.add_argument('-v', action='count', help="Enable verbosity for program runs")
+  parser.add_argument('-socket', action='store', help="Path of the Unix socket to listen on")
+  parser.add_argument('-host', action='store', default="127.0.0.1",
+                      help="Host to listen on without -socket (default: 127.0.0.1)")
+  parser.add_argument('-port', type=int, action='store', default=8420,
+                      help="TCP port to listen on without -socket (default: 8420)")
+  parser.add_argument('-cache', type=int, action='store', default=CACHE_SIZE,
+                      help=f"Number of solutions kept in the cache (default: {CACHE_SIZE})")
+  parser.add_argument('-landmarks', type=int, action='store', default=16,
+                      help="Number of landmarks for ALT (default: 16)")
+  parser.add_argument('-no-snapshot', action='store_true',
+                      help="Always parse the graph file instead of using its binary snapshot")
+  parser.add_argument('graph_file', action='store', help="Path to the graph input")
+  return parser
+
+
+if __name__ == "__main__":
+
+  args = create_parser().parse_args()
+  path.set_logging(v=args.v)
+  if args.cache < 0:
+    logging.error("-cache should be a non-negative integer")
+    sys.exit()
+  if args.landmarks < 1:
+    logging.error("-landmarks should be a positive integer")
+    sys.exit()
+  graph = path.load_graph(args=args)
+  service = PathService(graph=graph, graph_file=args.graph_file, cache_size=args.cache,
+                        num_landmarks=args.landmarks)
+  try:
+    server = create_server(service, socket_path=args.socket, host=args.host, port=args.port)
+  except FileExistsError as error:
+    logging.error(f"-socket {error}")
+    sys.exit()
+  print(f"Serving {args.graph_file} on {args.socket or f'{args.host}:{args.port}'}",
+        flush=True)
+  # Stop on SIGTERM as on Ctrl+C, so the socket is removed
+  signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit())
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    if args.socket:
+      os.remove(args.socket)
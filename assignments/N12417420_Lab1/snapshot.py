@@ -0,0 +1,96 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module maintains binary snapshots of parsed graph files.
+
+A snapshot is a directory `<graph_file>.snapshot` next to the graph file
+with one `.npy` file per array of `common.Graph`. The arrays are loaded
+as read-only memory maps, so loading a snapshot neither parses the graph
+file nor copies the arrays. A snapshot is valid while the (mtime, size)
+of the graph file are unchanged, or otherwise while the SHA-256 digest
+of its contents is unchanged.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from common import file_stamp
+from common import Graph
+
+_ARRAYS = ("x", "y", "offsets", "neighbours", "weights", "components")
+
+def snapshot_path(graph_file):
+  """Path of the snapshot directory stored next to a graph file"""
+  return f"{graph_file}.snapshot"
+
+def file_digest(graph_file):
+  """The SHA-256 digest of the contents of a file, read in chunks.
+
+  Returns:
+    A numpy array of 32 bytes.
+  """
+  digest = hashlib.sha256()
+  with open(graph_file, "rb") as f:
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+      digest.update(chunk)
+  return np.frombuffer(digest.digest(), dtype=np.uint8)
+
+def save_snapshot(graph, graph_file):
+  """Store a snapshot of a finalized graph next to its graph file.
+
+  The snapshot is written to a temporary directory first and then moved
+  in place, so a reader never sees a partially written snapshot.
+
+  Args:
+    graph: A finalized instance of `common.Graph`
+    graph_file: Path to the graph input the graph was read from
+  """
+  path = snapshot_path(graph_file)
+  tmp_path = tempfile.mkdtemp(prefix=os.path.basename(path) + ".",
+                              dir=os.path.dirname(os.path.abspath(path)))
+  try:
+    names = np.frombuffer("\n".join(graph.names).encode("ascii"), dtype=np.uint8)
+    np.save(os.path.join(tmp_path, "names.npy"), names)
+    for name in _ARRAYS:
+      np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(graph, name))
+    np.save(os.path.join(tmp_path, "digest.npy"), file_digest(graph_file))
+    np.save(os.path.join(tmp_path, "stamp.npy"), file_stamp(graph_file))
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+  finally:
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+def load_snapshot(graph_file):
+  """Load the snapshot of a graph file.
+
+  Args:
+    graph_file: Path to the graph input
+
+  Returns:
+    A finalized instance of `common.Graph` whose arrays are read-only
+    memory maps, or None if there is no valid snapshot.
+  """
+  path = snapshot_path(graph_file)
+  try:
+    stamp = file_stamp(graph_file)
+    if not np.array_equal(np.load(os.path.join(path, "stamp.npy")), stamp):
+      if not np.array_equal(np.load(os.path.join(path, "digest.npy")),
+                            file_digest(graph_file)):
+        logging.debug(f"Snapshot {path} is stale")
+        return None
+      # Same contents with a new mtime: keep the snapshot
+      np.save(os.path.join(path, "stamp.npy"), stamp)
+    names = np.load(os.path.join(path, "names.npy")).tobytes().decode("ascii")
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+              for name in _ARRAYS}
+  except (OSError, ValueError):
+    return None
+  logging.debug(f"Loaded the graph from the snapshot {path}")
+  return Graph.from_arrays(names=names.split("\n") if names else [], **arrays)
@@ -0,0 +1,103 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module snaps raw co-ordinates to the nearest node of a
+graph: with one vectorized scan for a few lookups, or with a spatial
+index over the co-ordinates of the nodes when it is reused by many.
+"""
+import math
+
+import numpy as np
+
+# Ranges with at most these many points are scanned linearly
+LEAF_SIZE = 8
+
+def nearest_node(graph, x, y):
+  """Find the node of a `common.Graph` nearest to the point (x, y) with a
+  linear scan of the co-ordinates. For a handful of lookups this is
+  much cheaper than building a `KDTree`.
+
+  Returns:
+    The id of the nearest node (the smallest id among equally near
+    nodes), or None if the graph is empty.
+  """
+  if len(graph) == 0:
+    return None
+  distances = ((np.asarray(graph.x, dtype=np.float64) - x)**2
+               + (np.asarray(graph.y, dtype=np.float64) - y)**2)
+  return int(np.argmin(distances))
+
+class KDTree():
+  """A static 2-d tree over the co-ordinates of the nodes of a graph.
+
+  The tree is implicit: `order` holds the node ids permuted such that for
+  every range `[lo, hi)` of the tree, the node at `mid = (lo + hi) // 2`
+  is the median of the range along the split axis (x at even depths and
+  y at odd depths), `[lo, mid)` holds the smaller and `(mid, hi)` the
+  larger co-ordinates.
+
+  Args:
+    x: An array of the X co-ordinates indexed by node id
+    y: An array of the Y co-ordinates indexed by node id
+  """
+  def __init__(self, x, y) -> None:
+    self.points = np.stack((np.asarray(x, dtype=np.float64),
+                            np.asarray(y, dtype=np.float64)))
+    self.order = np.arange(len(x), dtype=np.int64)
+    stack = [(0, len(x), 0)]
+    while stack:
+      lo, hi, depth = stack.pop()
+      if hi - lo <= LEAF_SIZE:
+        continue
+      mid = (lo + hi) // 2
+      axis = depth % 2
+      ids = self.order[lo:hi]
+      self.order[lo:hi] = ids[np.argpartition(self.points[axis][ids], mid - lo)]
+      stack.append((lo, mid, depth + 1))
+      stack.append((mid + 1, hi, depth + 1))
+
+  @classmethod
+  def from_graph(cls, graph):
+    """Build the tree over the nodes of a `common.Graph`"""
+    return cls(graph.x, graph.y)
+
+  def nearest(self, x, y):
+    """Find the node nearest to the point (x, y).
+
+    Args:
+      x: X co-ordinate of the point
+      y: Y co-ordinate of the point
+
+    Returns:
+      The id of the nearest node (the smallest id among equally near
+      nodes), or None if the tree is empty.
+    """
+    best = None
+    best_distance = math.inf
+    xs, ys = self.points
+    # Each element represents the (lo, hi, depth, lower bound) of a range
+    stack = [(0, len(self.order), 0, 0.0)]
+    while stack:
+      lo, hi, depth, bound = stack.pop()
+      if bound > best_distance or lo >= hi:
+        continue
+      if hi - lo <= LEAF_SIZE:
+        for node in self.order[lo:hi].tolist():
+          distance = (xs[node] - x)**2 + (ys[node] - y)**2
+          if distance < best_distance or (distance == best_distance and node < best):
+            best, best_distance = node, distance
+        continue
+      mid = (lo + hi) // 2
+      node = int(self.order[mid])
+      distance = (xs[node] - x)**2 + (ys[node] - y)**2
+      if distance < best_distance or (distance == best_distance and node < best):
+        best, best_distance = node, distance
+      diff = (x - xs[node]) if depth % 2 == 0 else (y - ys[node])
+      near, far = ((mid + 1, hi), (lo, mid)) if diff > 0 else ((lo, mid), (mid + 1, hi))
+      # The far side is searched last, and only if it can still be nearer
+      stack.append((far[0], far[1], depth + 1, diff**2))
+      stack.append((near[0], near[1], depth + 1, 0.0))
+    return best
@@ -0,0 +1,170 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module provides the tracing surface of the searches:
+debug messages of the expansions and counters of the search effort,
+along with wall times of the phases of a program run.
+
+A search asks for a `Tracer` once with `tracer()`, which returns None
+when neither debug logging nor statistics are enabled. The hot loops
+only call the tracer behind an `if tracer:` check, so a disabled tracer
+costs nothing: no message is formatted and no counter is updated.
+"""
+import contextlib
+import contextvars
+import logging
+import time
+
+class SearchStats():
+  """A class to hold the effort counters of one or more searches.
+
+  - `expanded`: number of nodes expanded
+  - `generated`: number of successors generated by the expansions
+  - `heap_pushes`: number of entries added to a frontier (queue or heap)
+  - `peak_frontier`: largest size of a frontier
+  """
+  def __init__(self) -> None:
+    self.expanded = 0
+    self.generated = 0
+    self.heap_pushes = 0
+    self.peak_frontier = 0
+
+  def add(self, other):
+    """Accumulate the counters of another `SearchStats` or of its
+    `to_dict()`"""
+    if isinstance(other, SearchStats):
+      other = other.to_dict()
+    self.expanded += other["expanded"]
+    self.generated += other["generated"]
+    self.heap_pushes += other["heap_pushes"]
+    self.peak_frontier = max(self.peak_frontier, other["peak_frontier"])
+
+  def to_dict(self):
+    return {
+      "expanded": self.expanded,
+      "generated": self.generated,
+      "heap_pushes": self.heap_pushes,
+      "peak_frontier": self.peak_frontier,
+    }
+
+class Tracer():
+  """A class to trace the expansions of a search.
+
+  Args:
+    debug: Whether the debug messages should be logged
+    stats: An instance of `SearchStats` to update, or None
+  """
+  def __init__(self, debug, stats) -> None:
+    self.debug = debug
+    self.stats = stats
+
+  def expand(self, successors, message, *args, count=1):
+    """Trace the expansion of a node
+
+    Args:
+      successors: The number of successors generated by the expansion
+      message: A `logging` format string for the debug message
+      args: The arguments of the format string
+      count: The number of nodes expanded at once, e.g. by a search which
+        expands a whole frontier at a time
+    """
+    if self.stats is not None:
+      self.stats.expanded += count
+      self.stats.generated += successors
+    if self.debug:
+      logging.debug(message, *args)
+
+  def push(self, frontier_size, message=None, *args, count=1):
+    """Trace an entry added to the frontier
+
+    Args:
+      frontier_size: The size of the frontier after the push
+      message: An optional `logging` format string for the debug message
+      args: The arguments of the format string
+      count: The number of entries added at once
+    """
+    if self.stats is not None:
+      self.stats.heap_pushes += count
+      if frontier_size > self.stats.peak_frontier:
+        self.stats.peak_frontier = frontier_size
+    if self.debug and message is not None:
+      logging.debug(message, *args)
+
+  def log(self, message, *args):
+    """Log a debug message"""
+    if self.debug:
+      logging.debug(message, *args)
+
+# The statistics collected in the current context, if any
+_active_stats = contextvars.ContextVar("active_stats", default=None)
+# The phase timer of the current context, if any
+_active_timer = contextvars.ContextVar("active_timer", default=None)
+
+def tracer():
+  """Return a `Tracer` for a search, or None when neither debug
+  logging nor statistics are enabled."""
+  stats = _active_stats.get()
+  debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+  if stats is None and not debug:
+    return None
+  return Tracer(debug=debug, stats=stats)
+
+@contextlib.contextmanager
+def collect_stats(stats=None):
+  """Collect the effort counters of the searches run in this context.
+
+  Args:
+    stats: An instance of `SearchStats` to accumulate into, or None for
+      a new one.
+
+  Yields:
+    The instance of `SearchStats`.
+  """
+  stats = SearchStats() if stats is None else stats
+  token = _active_stats.set(stats)
+  try:
+    yield stats
+  finally:
+    _active_stats.reset(token)
+
+class PhaseTimer():
+  """A class to accumulate the wall time of the phases of a run"""
+  def __init__(self) -> None:
+    self.phases = {}
+
+  def to_dict(self):
+    return {name: round(seconds, 6) for name, seconds in self.phases.items()}
+
+@contextlib.contextmanager
+def time_phases(timer=None):
+  """Record the wall time of the phases run in this context.
+
+  Args:
+    timer: An instance of `PhaseTimer`, or None for a new one.
+
+  Yields:
+    The instance of `PhaseTimer`.
+  """
+  timer = PhaseTimer() if timer is None else timer
+  token = _active_timer.set(timer)
+  try:
+    yield timer
+  finally:
+    _active_timer.reset(token)
+
+@contextlib.contextmanager
+def phase(name):
+  """Add the wall time of this context to the phase `name` of the
+  active `PhaseTimer`, if any."""
+  timer = _active_timer.get()
+  if timer is None:
+    yield
+    return
+  begin = time.perf_counter()
+  try:
+    yield
+  finally:
+    timer.phases[name] = timer.phases.get(name, 0.0) + time.perf_counter() - begin
@@ -0,0 +1,320 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module solves the CNF sentences using conflict driven
+clause learning (CDCL).
+
+Like `dpll.DPLL`, the solver assigns literals and propagates them with
+`propagation.WatchedClauses`, but when a clause becomes false it:
+- analyses the implication graph of the conflict back to its first
+  unique implication point (1-UIP), and learns the clause which
+  prevents the same conflict,
+- minimises the learned clause by removing the literals implied by its
+  other literals,
+- backjumps to the second highest decision level of the learned clause,
+  where the clause becomes unit, instead of undoing the last decision.
+
+The decisions pick the unbound atom of highest (VSIDS) activity, which
+grows every time the atom takes part in a conflict, with the last value
+it had (phase saving). The search restarts after a number of conflicts
+following the Luby sequence, and the half of the learned clauses with
+the most distinct decision levels (LBD) is regularly removed.
+"""
+import heapq
+import logging
+
+from dpll import DPLL
+from propagation import FALSE, TRUE, UNBOUND
+
+# Number of conflicts per unit of the Luby sequence between restarts
+RESTART_BASE = 100
+
+# Number of conflicts before the first reduction of the learned
+# clauses, and its increase after every reduction
+REDUCE_FIRST = 2000
+REDUCE_INCREMENT = 300
+
+# Learned clauses spanning at most these many decision levels are
+# never removed
+KEEP_LBD = 2
+
+# Decay of the activity of the atoms after every conflict
+ACTIVITY_DECAY = 0.95
+
+def luby(i):
+  """The i-th (from 0) element of the Luby sequence: 1, 1, 2, 1, 1, 2,
+  4, 1, 1, 2, ...
+  """
+  size, seq = 1, 0
+  while size < i + 1:
+    seq += 1
+    size = 2 * size + 1
+  while size - 1 != i:
+    size = (size - 1) >> 1
+    seq -= 1
+    i = i % size
+  return 2 ** seq
+
+class CDCL(DPLL):
+  """A class to solve the CNF sentences into a valid assignment
+  if possible, with clause learning
+  """
+  def __init__(self, sentences):
+    super().__init__(sentences)
+    num_atoms = len(self.database)
+    self.activity = [0.0] * num_atoms
+    self.increment = 1.0
+    # Heap of (-activity, atom) which can hold stale entries, of atoms
+    # which are bound or whose activity changed since
+    self.order = [(0.0, atom) for atom in range(num_atoms)]
+    self.phases = [FALSE] * num_atoms
+    self.seen = [False] * num_atoms
+    # Index of the learned clauses and their LBD
+    self.learned = {}
+    self.conflicts = 0
+    self.decisions = 0
+    self.restarts = 0
+
+  def run(self):
+    """Driver function to solve the CNF sentences
+
+    Returns:
+      A dict of the atoms and their "true"/"false" values which solve
+      the sentences, or "NO VALID ASSIGNMENT".
+    """
+    if self.engine.assign_units() is not None or not self.search():
+      return "NO VALID ASSIGNMENT"
+    logging.debug(f"conflicts: {self.conflicts}, decisions: {self.decisions}, "
+                  f"restarts: {self.restarts}, learned clauses: {len(self.learned)}")
+    return {atom: "true" if value == TRUE else "false"
+            for atom, value in zip(self.atoms, self.engine.values)}
+
+  def search(self):
+    """Search for an assignment which solves the clauses.
+
+    Returns:
+      True if the clauses are solved by the assignment of the
+      propagation engine, or False if they can not be solved.
+    """
+    engine = self.engine
+    restart_count = 0
+    next_restart = RESTART_BASE * luby(restart_count)
+    next_reduce = REDUCE_FIRST
+    reduce_interval = REDUCE_FIRST
+    conflicts_since_restart = 0
+    while True:
+      conflict = engine.propagate()
+      if conflict is not None:
+        self.conflicts += 1
+        conflicts_since_restart += 1
+        if engine.level == 0:
+          return False
+        learned, level = self.analyze(conflict)
+        self.backjump(level)
+        if len(learned) == 1:
+          engine.assign(learned[0])
+        else:
+          idx = engine.add_clause(learned)
+          self.learned[idx] = len({engine.levels[abs(literal) - 1] for literal in learned})
+          engine.assign(learned[0], idx)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+          logging.debug(f"learned clause: {' '.join(self.database.sentences([learned]))}, "
+                        f"backjump to level {level}")
+        self.increment /= ACTIVITY_DECAY
+        continue
+
+      if conflicts_since_restart >= next_restart:
+        logging.debug("restart")
+        self.restarts += 1
+        restart_count += 1
+        next_restart = RESTART_BASE * luby(restart_count)
+        conflicts_since_restart = 0
+        self.backjump(0)
+      if self.conflicts >= next_reduce:
+        reduce_interval += REDUCE_INCREMENT
+        next_reduce = self.conflicts + reduce_interval
+        self.reduce()
+
+      atom = self.pick_atom()
+      if atom is None:
+        return True
+      self.decisions += 1
+      literal = atom + 1 if self.phases[atom] == TRUE else -(atom + 1)
+      logging.debug(f"hard guess: {self.atoms[atom]}="
+                    f"{'true' if literal > 0 else 'false'}")
+      engine.decide(literal)
+
+  def pick_atom(self):
+    """Pop the unbound atom of highest activity from the heap.
+
+    Returns:
+      The atom id, or None if all the atoms are bound.
+    """
+    if len(self.order) > 4 * len(self.activity) + 64:
+      self.rebuild_order()
+    values, activity, order = self.engine.values, self.activity, self.order
+    while order:
+      negative_activity, atom = heapq.heappop(order)
+      if values[atom] == UNBOUND and -negative_activity == activity[atom]:
+        return atom
+    return None
+
+  def rebuild_order(self):
+    """Rebuild the heap of the unbound atoms without stale entries"""
+    values = self.engine.values
+    self.order = [(-self.activity[atom], atom) for atom in range(len(values))
+                  if values[atom] == UNBOUND]
+    heapq.heapify(self.order)
+
+  def bump(self, atom):
+    """Increase the activity of an atom which took part in a conflict"""
+    activity = self.activity
+    activity[atom] += self.increment
+    if activity[atom] > 1e100:
+      for other in range(len(activity)):
+        activity[other] *= 1e-100
+      self.increment *= 1e-100
+      self.rebuild_order()
+    elif self.engine.values[atom] == UNBOUND:
+      heapq.heappush(self.order, (-activity[atom], atom))
+
+  def backjump(self, level):
+    """Undo the assignments above a decision level, saving the values of
+    the atoms as their phases and queueing them for the decisions.
+    """
+    engine = self.engine
+    if level >= engine.level:
+      return
+    activity, phases, order = self.activity, self.phases, self.order
+    for literal in engine.trail[engine.trail_limits[level]:]:
+      atom = abs(literal) - 1
+      phases[atom] = TRUE if literal > 0 else FALSE
+      heapq.heappush(order, (-activity[atom], atom))
+    engine.backtrack(level)
+
+  def analyze(self, conflict):
+    """Learn a clause from a conflict.
+
+    The literals of the conflicting clause are resolved with the reasons
+    of the literals of the current decision level, from the last one on
+    the trail, until a single literal of the current level remains: the
+    first unique implication point.
+
+    Args:
+      conflict: The index of the conflicting clause
+
+    Returns:
+      The tuple (learned clause, backjump level). The first literal of the
+      clause is the negation of the UIP, the second one (if any) is of
+      the backjump level.
+    """
+    engine = self.engine
+    clauses, levels, reasons, trail = engine.clauses, engine.levels, engine.reasons, engine.trail
+    seen = self.seen
+    level = engine.level
+    learned = [None]
+    pending = 0
+    position = len(trail) - 1
+    literal = None
+    clause = clauses[conflict]
+    while True:
+      for other in clause:
+        if other == literal:
+          continue
+        atom = abs(other) - 1
+        if not seen[atom] and levels[atom] > 0:
+          seen[atom] = True
+          self.bump(atom)
+          if levels[atom] >= level:
+            pending += 1
+          else:
+            learned.append(other)
+      while not seen[abs(trail[position]) - 1]:
+        position -= 1
+      literal = trail[position]
+      position -= 1
+      seen[abs(literal) - 1] = False
+      pending -= 1
+      if pending == 0:
+        break
+      clause = clauses[reasons[abs(literal) - 1]]
+    learned[0] = -literal
+
+    minimized = self.minimize(learned)
+    for other in learned[1:]:
+      seen[abs(other) - 1] = False
+    learned = minimized
+
+    if len(learned) == 1:
+      return learned, 0
+    # The literal of the highest level other than the UIP is watched
+    highest = max(range(1, len(learned)), key=lambda k: levels[abs(learned[k]) - 1])
+    learned[1], learned[highest] = learned[highest], learned[1]
+    return learned, levels[abs(learned[1]) - 1]
+
+  def minimize(self, learned):
+    """Remove the literals of a learned clause which are implied by its
+    other literals, following their reasons back in the implication
+    graph.
+
+    Args:
+      learned: The learned clause, whose atoms other than the UIP are
+        marked as seen
+
+    Returns:
+      The minimised clause.
+    """
+    engine = self.engine
+    clauses, levels, reasons = engine.clauses, engine.levels, engine.reasons
+    seen = self.seen
+    clause_levels = {levels[abs(literal) - 1] for literal in learned[1:]}
+    marked = []
+    minimized = learned[:1]
+    for literal in learned[1:]:
+      reason = reasons[abs(literal) - 1]
+      if reason is None:
+        minimized.append(literal)
+        continue
+      # Depth first search of the reasons, which fails on a decision or
+      # on a level which is not in the clause
+      start = len(marked)
+      stack = [reason]
+      redundant = True
+      while stack and redundant:
+        for other in clauses[stack.pop()][1:]:
+          atom = abs(other) - 1
+          if seen[atom] or levels[atom] == 0:
+            continue
+          if reasons[atom] is None or levels[atom] not in clause_levels:
+            redundant = False
+            break
+          seen[atom] = True
+          marked.append(atom)
+          stack.append(reasons[atom])
+      if not redundant:
+        for atom in marked[start:]:
+          seen[atom] = False
+        del marked[start:]
+        minimized.append(literal)
+    for atom in marked:
+      seen[atom] = False
+    return minimized
+
+  def reduce(self):
+    """Remove the half of the learned clauses with the highest LBD,
+    except the ones of LBD up to `KEEP_LBD` and the reasons of the
+    current assignments.
+    """
+    engine = self.engine
+    locked = {engine.reasons[abs(literal) - 1] for literal in engine.trail}
+    candidates = [idx for idx, lbd in self.learned.items()
+                  if lbd > KEEP_LBD and idx not in locked]
+    candidates.sort(key=lambda idx: (self.learned[idx], len(engine.clauses[idx])), reverse=True)
+    removed = candidates[:len(self.learned) // 2]
+    engine.remove_clauses(removed)
+    for idx in removed:
+      del self.learned[idx]
+    logging.debug(f"removed {len(removed)} learned clauses")
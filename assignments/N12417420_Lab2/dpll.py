@@ -5,24 +5,90 @@
 #############################
 """
 The following module solves the CNF sentences using DPLL
+
+The sentences are compiled once into a `ClauseDatabase`, where every
+atom has an integer id (its position in the sorted list of atoms) and
+every clause is a tuple of signed integer literals: the atom with id `i`
+is the literal `i + 1` and its negation is `-(i + 1)`. The assignments
+are propagated through the clauses by `propagation.WatchedClauses`.
 """
 
 from yacc_parser import lexer
-from copy import deepcopy
 import logging
 import sys
 
 import common
+from propagation import TRUE, UNBOUND, WatchedClauses
+
+class ClauseDatabase():
+  """A class to compile CNF sentences into clauses of integer literals.
+
+  Args:
+    sentences: list of CNF sentences.
+  """
+  def __init__(self, sentences):
+    literal_clauses = [self.parse_literals(sentence) for sentence in sentences]
+    self.atoms = sorted({atom for literals in literal_clauses for _, atom in literals})
+    self.ids = {atom: idx for idx, atom in enumerate(self.atoms)}
+    self.clauses = []
+    for literals in literal_clauses:
+      clause = []
+      for negated, atom in literals:
+        literal = -(self.ids[atom] + 1) if negated else self.ids[atom] + 1
+        if literal not in clause:
+          clause.append(literal)
+      self.clauses.append(tuple(clause))
+
+  def __len__(self) -> int:
+    return len(self.atoms)
+
+  @staticmethod
+  def parse_literals(sentence):
+    """Get the literals of a sentence
+
+    Args:
+      sentence: A CNF sentence.
+
+    Returns:
+      A list of (negated, atom) tuples, in the order of the sentence.
+    """
+    literals = []
+    negated = False
+    lexer.input(sentence)
+    while True:
+      tok = lexer.token()
+      if not tok:
+        break
+      if tok.type == "NOT":
+        negated = not negated
+      elif tok.type == "ATOM":
+        literals.append((negated, tok.value))
+        negated = False
+    return literals
+
+  def atom(self, literal):
+    """The name of the atom of a literal"""
+    return self.atoms[abs(literal) - 1]
+
+  def literal_name(self, literal):
+    """The literal as text, i.e `P` or `!P`"""
+    return f"!{self.atom(literal)}" if literal < 0 else self.atom(literal)
+
+  def sentences(self, clauses):
+    """The clauses as CNF sentences, for printing"""
+    return [" ".join(self.literal_name(literal) for literal in clause) for clause in clauses]
 
 class DPLL():
   """A class to solve the CNF sentences into a valid assignment
   if possible
   """
   def __init__(self, sentences):
-    self.atoms = sorted(self.parse_atoms(sentences))
     self.sentences = sentences
-    self.V = {atom : "UNBOUND" for atom in self.atoms}
+    self.database = ClauseDatabase(sentences)
     self.validate_sentences()
+    self.atoms = self.database.atoms
+    self.engine = WatchedClauses(len(self.database), self.database.clauses)
+    self.init_counts()
 
   def validate_sentences(self):
     """Validate the sentences.
@@ -39,219 +105,181 @@ class DPLL():
           sys.exit()
 
   def run(self):
-    """Driver function to solve the CNF sentences"""
-    return self.solve(self.atoms, self.sentences, self.V)
-
-  def parse_atoms(self, sentences):
-    """Get all the atoms in sentences
-
-    Args:
-      sentences: list of CNF sentences.
+    """Driver function to solve the CNF sentences
 
     Returns:
-      A list of atoms in all the sentences
+      A dict of the atoms and their "true"/"false" values which solve
+      the sentences, or "NO VALID ASSIGNMENT".
     """
-    atoms = set()
-    text = "\n".join(sentences)
-    lexer.input(text)
-    while True:
-      tok = lexer.token()
-      if not tok:
-        break
-      if tok.type == "ATOM":
-        atoms.add(tok.value)
-    return atoms
-
-  def get_literal_positions(self, sentences):
-    """Get positions of literals in the sentences
-
-    Args:
-      sentences: list of CNF sentences.
-
-    Returns:
-      A dict of literals and their positions in the sentences
+    if self.engine.assign_units() is not None:
+      return "NO VALID ASSIGNMENT"
+    self.log_easy_cases(0)
+    if not self.solve():
+      return "NO VALID ASSIGNMENT"
+    return {atom: "true" if value == TRUE else "false"
+            for atom, value in zip(self.atoms, self.engine.values)}
+
+  def init_counts(self):
+    """Count, for every clause, its true literals and, for every literal,
+    the clauses which are not satisfied yet and contain it.
+
+    The counts follow the assignments on the trail of the engine (up to
+    `counted`) and are undone with them, so checking if all the clauses
+    are satisfied, or finding the pure literals, does not have to look
+    at the clauses.
     """
-    token_positions = []
-    text = "\n".join(sentences)
-    lexer.input(text)
-    while True:
-      tok = lexer.token()
-      if not tok:
-        break
-      token_positions.append((tok.type, tok.value, tok.lineno, tok.lexpos))
-
-    literal_positions = {}
-    for idx, tok_pos in enumerate(token_positions):
-      if tok_pos[0] == "ATOM":
-        if idx == 0:
-          literal_positions[tok_pos[1]] = tok_pos[2]
-        elif token_positions[idx-1][0] == "NOT":
-          literal_positions[f"!{tok_pos[1]}"] = tok_pos[2]
-        else:
-          literal_positions[tok_pos[1]] = tok_pos[2]
-
-    return sorted(literal_positions)
-
-  def get_atom_negation_mapping(self, atoms):
-    """Helper method which returns a dictionary of atoms
-    along with their negation mappings, and vice-versa.
-
-    Args:
-      atoms: A list of atoms
-
-    Returns:
-      A dict of atoms along with their negation mappings,
-      and vice-versa.
+    num_atoms = len(self.database)
+    clauses = self.engine.clauses
+    # Indexed by the literal itself, as `WatchedClauses.watches`
+    self.occurrences = [[] for _ in range(2 * num_atoms + 1)]
+    self.live = [0] * (2 * num_atoms + 1)
+    for idx, clause in enumerate(clauses):
+      for literal in clause:
+        self.occurrences[literal].append(idx)
+        self.live[literal] += 1
+    self.true_counts = [0] * len(clauses)
+    self.unsatisfied = len(clauses)
+    self.counted = 0
+    self.pure_candidates = [literal for atom in range(1, num_atoms + 1) for literal in (atom, -atom)
+                            if self.live[-literal] == 0]
+
+  def count_assignments(self):
+    """Update the counts with the assignments on the trail which were
+    not counted yet.
     """
-    atom_negation_mapping = {}
-    for atom in atoms:
-      atom_negation_mapping[atom] = f"!{atom}"
-      atom_negation_mapping[f"!{atom}"] = atom
-    return atom_negation_mapping
-
-  def get_pure_literals(self, atoms, sentences):
-    """Get a sorted list of pure literals in the sentences
-
-    Args:
-      atoms: A list of atoms to consider.
-      sentences: A list of sentences to consider.
+    trail, clauses, true_counts, live = (self.engine.trail, self.engine.clauses,
+                                         self.true_counts, self.live)
+    for literal in trail[self.counted:]:
+      for idx in self.occurrences[literal]:
+        true_counts[idx] += 1
+        if true_counts[idx] == 1:
+          self.unsatisfied -= 1
+          for other in clauses[idx]:
+            live[other] -= 1
+            if live[other] == 0:
+              self.pure_candidates.append(-other)
+    self.counted = len(trail)
+
+  def backtrack(self, level):
+    """Undo the assignments above a decision level and their counts"""
+    engine = self.engine
+    limit = engine.trail_limits[level]
+    clauses, true_counts, live = engine.clauses, self.true_counts, self.live
+    for literal in reversed(engine.trail[limit:self.counted]):
+      for idx in self.occurrences[literal]:
+        true_counts[idx] -= 1
+        if true_counts[idx] == 0:
+          self.unsatisfied += 1
+          for other in clauses[idx]:
+            live[other] += 1
+    self.counted = min(self.counted, limit)
+    engine.backtrack(level)
+
+  def log_easy_cases(self, start):
+    """Log the literals assigned on the trail after position `start`"""
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+      for literal in self.engine.trail[start:]:
+        logging.debug(f"easy case: {self.database.atom(literal)}="
+                      f"{'true' if literal > 0 else 'false'}")
+
+  def print_clauses(self, clauses):
+    """Print the clauses as sentences in debug mode"""
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+      common.print_sentences(self.database.sentences(clauses))
+
+  def remaining_clauses(self):
+    """Get the clauses which are not satisfied by the assignment yet
 
     Returns:
-      A sorted list of pure literals in the sentences.
+      A list of the unsatisfied clauses, without their false literals.
     """
-    atom_negation_mapping = self.get_atom_negation_mapping(atoms)
-    pure_literals = []
-    literal_positions = self.get_literal_positions(sentences)
-    for literal in atom_negation_mapping:
-      if literal in literal_positions and atom_negation_mapping[literal] not in literal_positions:
-        pure_literals.append(literal)
-    pure_literals.sort(key=lambda x: x.split("!")[-1])
-    return pure_literals
-
-  def obvious_assign(self, literal, V):
-    """Assign the obvious value to the literal and store in V
+    value = self.engine.value
+    remaining = []
+    for clause in self.engine.clauses:
+      literals = []
+      for literal in clause:
+        literal_value = value(literal)
+        if literal_value == TRUE:
+          break
+        if literal_value == UNBOUND:
+          literals.append(literal)
+      else:
+        remaining.append(literals)
+    return remaining
 
-    Args:
-      literal: The literal string
-      V: The atom assignment dictionary.
+  def get_pure_literals(self):
+    """Get a sorted list of pure literals: the literals of unbound atoms
+    which are in unsatisfied clauses, while their negation is not.
 
     Returns:
-      The atom assignment dictionary after assigning the obvious
-      value to the atom corresponding to the literal.
+      A list of pure literals, sorted by atom.
     """
-    literal = literal.strip()
-    if literal in self.atoms:
-      atom = literal
-      V[atom] = "true"
-      logging.debug(f"easy case: {atom}=true")
-    elif "!" in literal:
-      atom = literal.split("!")[-1]
-      V[atom] = "false"
-      logging.debug(f"easy case: {atom}=false")
-    return V
-
-  def get_atom(self, literal):
-    """Return the atom corresponding to the literal
+    values, live = self.engine.values, self.live
+    pure_literals = {literal for literal in self.pure_candidates
+                     if values[abs(literal) - 1] == UNBOUND
+                     and live[literal] > 0 and live[-literal] == 0}
+    self.pure_candidates = []
+    return sorted(pure_literals, key=abs)
 
-    Args:
-      literal: A literal
+  def simplify(self):
+    """Apply the easy cases until there are none left: propagate the
+    unit clauses and assign the pure literals.
 
     Returns:
-      atom corresponding to the literal
+      False if a clause became false, else True.
     """
-    if "!" in literal:
-      return literal.strip().split("!")[-1]
-    return literal.strip()
-
-  def propagate(self, atom, sentences, V):
-    """Propagate the newly assigned value of atom through
-    the sentences.
-
-    Args:
-      atom: An atom in the tree.
-      sentences: The list of sentences to propagate the atom value
-      V: The atom assignment dictionary
+    engine = self.engine
+    while(True):
+      start = len(engine.trail)
+      conflict = engine.propagate()
+      self.count_assignments()
+      self.log_easy_cases(start)
+      if conflict is not None:
+        return False
+
+      if logging.getLogger().isEnabledFor(logging.DEBUG):
+        self.print_clauses(self.remaining_clauses())
+      pure_literals = self.get_pure_literals() if self.unsatisfied else []
+      if not pure_literals:
+        return True
+      for pure_literal in pure_literals:
+        engine.assign(pure_literal)
+      self.log_easy_cases(len(engine.trail) - len(pure_literals))
+
+  def solve(self):
+    """Solve the clauses using DPLL, from the current assignment of the
+    propagation engine.
+
+    The hard guesses are kept on a stack instead of recursing: the atom
+    guessed at every decision level, first as true. When a clause becomes
+    false, the last guess is undone and its atom is made false below its
+    level, so a failure of that branch undoes the guess before it.
 
     Returns:
-      A list of sentences after atom propagation
+      True if the assignment was extended to one which solves the
+      clauses, else False.
     """
-    new_sentences = []
-    for clause in sentences:
-      if (f"!{atom}" in clause and V[atom] == "false"):
-        continue
-      elif (f"!{atom}" in clause and V[atom] == "true"):
-        clause = clause.replace(f"!{atom}", "")
-        new_sentences.append(clause.strip())
-      elif (atom in clause and V[atom] == "true"):
+    engine = self.engine
+    guesses = []
+    while(True):
+      if not self.simplify():
+        if not guesses:
+          return False
+        idx = guesses.pop()
+        logging.debug(f"failed hard guess: try {self.atoms[idx]}=false")
+        self.backtrack(engine.level - 1)
+        engine.assign(-(idx + 1))
         continue
-      elif (atom in clause and V[atom] == "false"):
-        clause = clause.replace(atom, "")
-        new_sentences.append(clause.strip())
-      else:
-        new_sentences.append(clause.strip())
-    return new_sentences
 
-  def solve(self, atoms, sentences, V):
-    """Solve the CNF sentences using DPLL
-
-    Args:
-      atoms: A list of atoms
-      sentences: A list of sentences to solve
-      V: The atom assignment dictionary
-
-    Returns:
-      The final atom assignment dictionary which solved the
-      sentences or "NO VALID ASSIGNMENT".
-    """
-    while(True):
-      if len(sentences)==0:
-        for atom in atoms:
-          if V[atom] == "UNBOUND":
-            V[atom] = "false"
+      if self.unsatisfied==0:
+        for idx, atom in enumerate(self.atoms):
+          if engine.values[idx] == UNBOUND:
+            engine.assign(-(idx + 1))
             logging.debug(f"Unbound default case: {atom}=false")
-        return V
-
-      else:
-        for clause in sentences:
-          if clause == "":
-            return "NO VALID ASSIGNMENT"
-
-        easy_case = False
-        literal_positions = self.get_literal_positions(sentences)
-        for clause in sentences:
-          clause = clause.strip()
-          if len(clause.split(" "))==1 and clause.split(" ")[0] in literal_positions:
-            literal = clause.split(" ")[0]
-            V = self.obvious_assign(literal, V)
-            sentences = self.propagate(self.get_atom(literal), sentences, V)
-            common.print_sentences(sentences)
-            easy_case = True
-            break
-
-        pure_literals = self.get_pure_literals(atoms, sentences)
-        for pure_literal in pure_literals:
-          V = self.obvious_assign(pure_literal, V)
-          sentences = [clause for clause in sentences if pure_literal not in clause]
-          common.print_sentences(sentences)
-          easy_case = True
-
-        if not easy_case:
-          break
+        return True
 
-    for atom in atoms:
-      if V[atom] == "UNBOUND":
-        logging.debug(f"hard guess: {atom}=true")
-        V[atom] = "true"
-        tmp_sentences = deepcopy(sentences)
-        tmp_sentences = self.propagate(atom, tmp_sentences, V)
-        common.print_sentences(tmp_sentences)
-        tmp_V = deepcopy(V)
-        V_new = self.solve(atoms, tmp_sentences, tmp_V)
-        if V_new != "NO VALID ASSIGNMENT":
-          return V_new
-
-        logging.debug(f"failed hard guess: try {atom}=false")
-        V[atom] = "false"
-        tmp_sentences = self.propagate(atom, sentences, V)
-        common.print_sentences(tmp_sentences)
-        return self.solve(atoms, tmp_sentences, V)
\ No newline at end of file
+      # The atoms before the last guess are all bound
+      idx = engine.values.index(UNBOUND, guesses[-1] + 1 if guesses else 0)
+      logging.debug(f"hard guess: {self.atoms[idx]}=true")
+      guesses.append(idx)
+      engine.decide(idx + 1)
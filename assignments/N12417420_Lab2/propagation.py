@@ -0,0 +1,197 @@
+#############################
+## Author: Vignesh Kothapalli
+## NetID: vk2115
+## ID: N12417420
+#############################
+"""
+The following module implements unit propagation with two watched
+literals per clause and an assignment trail.
+
+Every clause of two or more literals watches its first two literals.
+As long as both are not false the clause can be neither unit nor
+conflicting, so when a literal becomes false only the clauses watching
+it are visited: each of them either finds another literal which is not
+false to watch, or has become unit (its other watch is implied) or
+conflicting. The watches do not have to be restored when the search
+backtracks, since unassigning literals can not make a watched literal
+false.
+
+The literals are the signed integers of `dpll.ClauseDatabase`.
+"""
+
+# Values of the atoms in the assignment array
+UNBOUND = 0
+TRUE = 1
+FALSE = -1
+
+class WatchedClauses():
+  """A class to assign literals and propagate them through clauses.
+
+  The assigned literals are kept in order on a trail, split into
+  decision levels: a new level starts with every decision, and
+  `backtrack` undoes the assignments of the levels above a given one.
+
+  Args:
+    num_atoms: The number of atoms
+    clauses: A list of clauses, each a sequence of integer literals
+  """
+  def __init__(self, num_atoms, clauses) -> None:
+    self.values = [UNBOUND] * num_atoms
+    self.levels = [0] * num_atoms
+    # The clause which implied the value of every atom, None for the
+    # decisions and the easy cases
+    self.reasons = [None] * num_atoms
+    self.trail = []
+    # Length of the trail at the start of every decision level
+    self.trail_limits = []
+    # Position on the trail of the next literal to propagate
+    self.head = 0
+    # The clauses watching a literal, indexed by the literal itself: the
+    # negative literals are at the end of the list
+    self.watches = [[] for _ in range(2 * num_atoms + 1)]
+    self.clauses = []
+    self.units = []
+    self.empty = False
+    for clause in clauses:
+      self.add_clause(clause)
+
+  @property
+  def level(self):
+    """The current decision level"""
+    return len(self.trail_limits)
+
+  def add_clause(self, clause):
+    """Add a clause and watch its first two literals.
+
+    Clauses of one literal can not be watched, they are kept in `units`
+    instead, and an empty clause marks the clauses as unsatisfiable.
+
+    Returns:
+      The index of the clause.
+    """
+    clause = list(clause)
+    idx = len(self.clauses)
+    self.clauses.append(clause)
+    if len(clause) > 1:
+      self.watches[clause[0]].append(idx)
+      self.watches[clause[1]].append(idx)
+    elif clause:
+      self.units.append(idx)
+    else:
+      self.empty = True
+    return idx
+
+  def remove_clauses(self, indices):
+    """Remove clauses, which must not be the reason of an assignment.
+    The other clauses keep their index.
+    """
+    indices = set(indices)
+    for idx in indices:
+      self.clauses[idx] = None
+    self.watches = [[idx for idx in watchers if idx not in indices]
+                    for watchers in self.watches]
+
+  def value(self, literal):
+    """The value of a literal: TRUE, FALSE or UNBOUND"""
+    value = self.values[abs(literal) - 1]
+    return value if literal > 0 else -value
+
+  def assign(self, literal, reason=None):
+    """Make a literal true at the current decision level.
+
+    Args:
+      literal: The literal, whose atom must be unbound
+      reason: The index of the clause which implied the literal, if any
+    """
+    atom = abs(literal) - 1
+    self.values[atom] = TRUE if literal > 0 else FALSE
+    self.levels[atom] = len(self.trail_limits)
+    self.reasons[atom] = reason
+    self.trail.append(literal)
+
+  def decide(self, literal):
+    """Start a new decision level by making a literal true"""
+    self.trail_limits.append(len(self.trail))
+    self.assign(literal)
+
+  def backtrack(self, level):
+    """Undo the assignments of the decision levels above `level`"""
+    if level >= len(self.trail_limits):
+      return
+    limit = self.trail_limits[level]
+    values, trail = self.values, self.trail
+    for literal in trail[limit:]:
+      values[abs(literal) - 1] = UNBOUND
+    del trail[limit:]
+    del self.trail_limits[level:]
+    self.head = min(self.head, limit)
+
+  def assign_units(self):
+    """Assign the literals of the clauses of one literal.
+
+    Returns:
+      The index of a unit clause whose literal is already false (or of
+      the empty clause, -1), or None.
+    """
+    if self.empty:
+      return -1
+    for idx in self.units:
+      literal = self.clauses[idx][0]
+      value = self.value(literal)
+      if value == FALSE:
+        return idx
+      if value == UNBOUND:
+        self.assign(literal, idx)
+    return None
+
+  def propagate(self):
+    """Propagate the literals on the trail which were not propagated yet,
+    assigning the literals implied by the clauses which became unit.
+
+    Returns:
+      The index of a clause whose literals are all false, or None.
+    """
+    values, clauses, watches, trail = self.values, self.clauses, self.watches, self.trail
+    while self.head < len(trail):
+      false_literal = -trail[self.head]
+      self.head += 1
+      watchers = watches[false_literal]
+      kept = 0
+      position = 0
+      while position < len(watchers):
+        idx = watchers[position]
+        position += 1
+        clause = clauses[idx]
+        # Keep the false literal as the second watch
+        if clause[0] == false_literal:
+          clause[0], clause[1] = clause[1], false_literal
+        other = clause[0]
+        other_value = values[abs(other) - 1]
+        if other < 0:
+          other_value = -other_value
+        if other_value == TRUE:
+          watchers[kept] = idx
+          kept += 1
+          continue
+        for k in range(2, len(clause)):
+          literal = clause[k]
+          value = values[abs(literal) - 1]
+          if (value if literal > 0 else -value) != FALSE:
+            clause[1], clause[k] = literal, false_literal
+            watches[literal].append(idx)
+            break
+        else:
+          watchers[kept] = idx
+          kept += 1
+          if other_value == FALSE:
+            # Keep the remaining watchers before reporting the conflict
+            while position < len(watchers):
+              watchers[kept] = watchers[position]
+              kept += 1
+              position += 1
+            del watchers[kept:]
+            self.head = len(trail)
+            return idx
+          self.assign(other, idx)
+      del watchers[kept:]
+    return None
@@ -8,6 +8,7 @@ The following module provides an interface for the following modes:
 - A generic DPLL solver using the 'dpll' mode
 - A BNF to CNF converter using the 'cnf' mode
 - A direct BNF solver using the 'solver' mode.
+- A CDCL solver using the 'cdcl' mode
 """
 
 import argparse
@@ -16,6 +17,7 @@ import logging
 import sys
 
 import converter
+from cdcl import CDCL
 from dpll import DPLL
 
 class Modes(enum.Enum):
@@ -23,6 +25,7 @@ class Modes(enum.Enum):
   cnf = 1
   dpll = 2
   solver = 3
+  cdcl = 4
 
 def create_parser():
   """Creates the argument parser to control the program executions.
@@ -36,7 +39,7 @@ def create_parser():
   parser.version = "1.0.0"
   parser.add_argument('-v', action='count', help="Enable verbosity for program runs")
   parser.add_argument('-mode', action='store', help="Mode to run the program. "
-                                                    "One of cnf, dpll, solver.")
+                                                    "One of cnf, dpll, solver, cdcl.")
   parser.add_argument('input_file', action='store', help="Path to the input file")
   return parser
 
@@ -47,21 +50,19 @@ def validate_args(args):
     args: Parsed args from `argparse.ArgumentParser`.
   """
   if not args.mode:
-    logging.error("please provide the -mode option (one of cnf, dpll, solver)")
+    logging.error("please provide the -mode option (one of cnf, dpll, solver, cdcl)")
     sys.exit()
   valid_modes = [mode.name for mode in Modes]
   if args.mode and args.mode not in valid_modes:
-    logging.error("-mode option should be one of: cnf, dpll, solver")
+    logging.error("-mode option should be one of: cnf, dpll, solver, cdcl")
     sys.exit()
 
 def _cnf_mode(lines):
   """Helper function to run in 'cnf' mode"""
   return converter.run(lines)
 
-def _dpll_mode(lines):
-  """Helper function to run in 'dpll' mode"""
-  dpll_solver = DPLL(lines)
-  result = dpll_solver.run()
+def _print_result(result):
+  """Print the assignment found by a solver"""
   if result == "NO VALID ASSIGNMENT":
     print(result)
   else:
@@ -69,11 +70,21 @@ def _dpll_mode(lines):
     for k, v in result.items():
       print(f"{k}={v}")
 
+def _dpll_mode(lines):
+  """Helper function to run in 'dpll' mode"""
+  dpll_solver = DPLL(lines)
+  _print_result(dpll_solver.run())
+
+def _cdcl_mode(lines):
+  """Helper function to run in 'cdcl' mode"""
+  cdcl_solver = CDCL(lines)
+  _print_result(cdcl_solver.run())
+
 def solve(mode, input_file):
-  """driver function for all the three modes.
+  """driver function for all the modes.
 
   Args:
-    mode: One of 'cnf', 'dpll', 'solver'
+    mode: One of 'cnf', 'dpll', 'solver', 'cdcl'
     input_file: Path to file containing sentences.
   """
   lines = []
@@ -89,6 +100,8 @@ def solve(mode, input_file):
     _dpll_mode(lines)
   elif mode == Modes.solver.name:
     _dpll_mode(_cnf_mode(lines))
+  elif mode == Modes.cdcl.name:
+    _cdcl_mode(lines)
 
 def set_logging(v):
   """Create a logger for the program